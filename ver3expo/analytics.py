@@ -0,0 +1,307 @@
+# coding: utf-8
+"""
+Analítica de preguntas y secciones para calibrar dificultad.
+
+- Ingresa los resultados de los logs de partidas (matchlog) a arreglos
+  columnares: pregunta, sección, equipo, ronda, tiempo de buzzer,
+  correcta/errada/sin respuesta y timeout. Se pueden cachear en .npz.
+- Calcula por pregunta y por sección, en pasadas vectorizadas (bincount y
+  un solo sort), la tasa de acierto, la distribución del tiempo de buzzer y la
+  discriminación (correlación punto-biserial con el rendimiento del equipo
+  en el resto de la ronda).
+- Exporta una columna 'difficulty' al CSV del banco.
+
+  python analytics.py partidas.qlog --bank questions.csv
+  python analytics.py partidas.qlog --bank questions.csv --export questions.csv
+  python analytics.py --bench 5000000
+"""
+import csv, os, time
+import numpy as np
+import matchlog
+from bank import expand_bank_paths, bank_names, load_banks, namespace_id
+
+UNANSWERED, WRONG, CORRECT = -1, 0, 1
+MIN_ATTEMPTS = 20 # mínimo de respuestas para opinar sobre una pregunta
+
+# ---------- ingreso ----------
+class Outcomes:
+    """Intentos en columnas; cada fila es una pregunta mostrada a un equipo (o a nadie)."""
+    COLUMNS = ("question", "section", "team", "round", "buzz", "result", "timeout")
+
+    def __init__(self, question, section, team, round_, buzz, result, timeout, qids, sections):
+        self.question = question # int32, índice en qids
+        self.section = section # int32, índice en sections
+        self.team = team # int8, 0=A 1=B -1=nadie
+        self.round = round_ # int32, ronda global
+        self.buzz = buzz # float32 s, NaN sin buzzer
+        self.result = result # int8 CORRECT/WRONG/UNANSWERED
+        self.timeout = timeout # bool
+        self.qids = qids
+        self.sections = sections
+        self._rest = None
+
+    def __len__(self):
+        return len(self.question)
+
+    @classmethod
+    def from_logs(cls, paths, qid_section, banks=()):
+        """`banks`: nombres de banco; los ids sin espacio de nombres de logs viejos son del primero."""
+        qcode, scode = {}, {}
+        cols = {c: [] for c in cls.COLUMNS}
+        round_no = 0
+
+        def add(qid, team, buzz, result, timed_out):
+            section = qid_section.get(qid, "")
+            cols["question"].append(qcode.setdefault(qid, len(qcode)))
+            cols["section"].append(scode.setdefault(section, len(scode)))
+            cols["team"].append(team)
+            cols["round"].append(round_no)
+            cols["buzz"].append(buzz)
+            cols["result"].append(result)
+            cols["timeout"].append(timed_out)
+
+        for path in paths:
+            reader = matchlog.MatchLogReader(path)
+            qid = shown = buzz = team = None
+            marked = timed_out = in_round = False
+            for _, kind, ts, payload in reader.records():
+                if kind == matchlog.RESUME:
+                    # ronda retomada: la pregunta en curso se vuelve a mostrar con su QUESTION,
+                    # no cuenta como sin respuesta; ronda nueva solo si el log no la tenía abierta
+                    qid = None
+                    if not in_round:
+                        round_no += 1
+                    in_round = True
+                    continue
+                if kind in (matchlog.QUESTION, matchlog.ROUND_END, matchlog.ROUND_START):
+                    if qid is not None and not marked:
+                        add(qid, -1, float("nan"), UNANSWERED, timed_out)
+                    qid = None
+                if kind == matchlog.ROUND_START:
+                    round_no += 1
+                    in_round = True
+                elif kind == matchlog.ROUND_END:
+                    in_round = False
+                elif kind == matchlog.QUESTION:
+                    qid = namespace_id(matchlog.decode(kind, payload)["qid"], banks)
+                    shown, buzz, team = ts, None, None
+                    marked = timed_out = False
+                elif kind == matchlog.BUZZ:
+                    team = 0 if payload[:1] == b"A" else 1
+                    buzz = ts - shown if shown else None
+                elif kind == matchlog.TIMEOUT:
+                    timed_out = True
+                elif kind == matchlog.MARK and qid is not None:
+                    mark_team = 0 if payload[:1] == b"A" else 1
+                    add(qid, mark_team, buzz if buzz is not None and mark_team == team else float("nan"),
+                        CORRECT if payload[1] else WRONG, timed_out)
+                    marked = True
+            reader.close()
+
+        inv_q = [None] * len(qcode)
+        for k, v in qcode.items():
+            inv_q[v] = k
+        inv_s = [None] * len(scode)
+        for k, v in scode.items():
+            inv_s[v] = k
+        return cls(np.array(cols["question"], np.int32), np.array(cols["section"], np.int32),
+                   np.array(cols["team"], np.int8), np.array(cols["round"], np.int32),
+                   np.array(cols["buzz"], np.float32), np.array(cols["result"], np.int8),
+                   np.array(cols["timeout"], bool), inv_q, inv_s)
+
+    def save(self, path):
+        np.savez_compressed(path, qids=np.array(self.qids, dtype=object), sections=np.array(self.sections, dtype=object),
+                            **{c: getattr(self, c) for c in self.COLUMNS})
+
+    @classmethod
+    def load(cls, path):
+        d = np.load(path, allow_pickle=True)
+        return cls(d["question"], d["section"], d["team"], d["round"], d["buzz"], d["result"], d["timeout"],
+                   list(d["qids"]), list(d["sections"]))
+
+# ---------- métricas ----------
+def _group_quantiles(keys, values, n_groups, qs):
+    """Cuantiles de `values` (>= 0) por grupo, NaN ignorados, con un solo sort."""
+    ok = ~np.isnan(values)
+    keys, values = keys[ok], values[ok].astype(np.float64)
+    out = np.full((len(qs), n_groups), np.nan, np.float32)
+    if not len(keys):
+        return out
+    # clave compuesta grupo*escala + valor: ordenar una vez agrupa y ordena a la vez
+    scale = float(values.max()) + 1.0
+    comp = keys * scale + values
+    comp.sort()
+    counts = np.bincount(keys, minlength=n_groups)
+    values = comp - np.repeat(np.arange(n_groups, dtype=np.float64), counts) * scale
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    has = counts > 0
+    for i, q in enumerate(qs):
+        idx = starts[has] + np.floor(q * (counts[has] - 1)).astype(np.int64)
+        out[i, has] = values[idx]
+    return out
+
+def _rest_score(o, answered, correct):
+    """Acierto del equipo en el resto de su ronda (excluye la propia fila)."""
+    if o._rest is None:
+        team_round = o.round.astype(np.int64) * 2 + np.maximum(o.team, 0)
+        tr_ans = np.bincount(team_round, weights=answered)[team_round]
+        tr_ok = np.bincount(team_round, weights=correct)[team_round]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            o._rest = (tr_ok - correct) / (tr_ans - 1)
+    return o._rest
+
+def group_stats(o, keys, n_groups):
+    """Tasa de acierto, buzzer y discriminación agrupando filas por `keys`."""
+    answered = o.result != UNANSWERED
+    correct = (o.result == CORRECT).astype(np.float64)
+    shown = np.bincount(keys, minlength=n_groups)
+    n_ans = np.bincount(keys, weights=answered, minlength=n_groups)
+    n_ok = np.bincount(keys, weights=correct, minlength=n_groups)
+    n_timeout = np.bincount(keys, weights=o.timeout, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = n_ok / n_ans
+
+    rest = _rest_score(o, answered, correct)
+    use = answered & np.isfinite(rest)
+
+    # correlación de Pearson por grupo a partir de sumas (punto-biserial)
+    k, x, y = keys[use], correct[use], rest[use]
+    n = np.bincount(k, minlength=n_groups)
+    sx = np.bincount(k, weights=x, minlength=n_groups)
+    sy = np.bincount(k, weights=y, minlength=n_groups)
+    sxy = np.bincount(k, weights=x * y, minlength=n_groups)
+    sxx = np.bincount(k, weights=x * x, minlength=n_groups)
+    syy = np.bincount(k, weights=y * y, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sy / n
+        disc = cov / np.sqrt((sxx - sx * sx / n) * (syy - sy * sy / n))
+
+    p10, p50, p90 = _group_quantiles(keys, o.buzz, n_groups, (0.1, 0.5, 0.9))
+    return {
+        "shown": shown, "answered": n_ans.astype(np.int64), "correct": n_ok.astype(np.int64),
+        "timeouts": n_timeout.astype(np.int64), "p_correct": p,
+        "buzz_p10": p10, "buzz_median": p50, "buzz_p90": p90, "discrimination": disc,
+        # dificultad suavizada (Laplace) para no saltar a 0/1 con pocas respuestas
+        "difficulty": (n_ans - n_ok + 1) / (n_ans + 2),
+    }
+
+def question_stats(o):
+    return group_stats(o, o.question, len(o.qids))
+
+def section_stats(o):
+    return group_stats(o, o.section, len(o.sections))
+
+def flag_suspicious(stats, min_attempts=MIN_ATTEMPTS):
+    """Preguntas con muchas respuestas y casi nadie acierta, o discriminación negativa:
+    candidatas a tener mal el valor de 'correct'."""
+    enough = stats["answered"] >= min_attempts
+    with np.errstate(invalid="ignore"):
+        bad = enough & ((stats["p_correct"] < 0.1) | (stats["discrimination"] < -0.2))
+    return np.flatnonzero(bad)
+
+# ---------- banco ----------
+def bank_sections(paths):
+    """(banco:id -> sección, nombres de banco) según los CSV del banco."""
+    _, index, names = load_banks(paths)
+    return {qid: q["section"] for qid, q in index.items()}, names
+
+def export_difficulty(bank_path, bank, out_path, o, stats, min_attempts=MIN_ATTEMPTS):
+    """Escribe el banco `bank` con la columna 'difficulty' (vacía si hay pocas respuestas)."""
+    diff = {qid: stats["difficulty"][i] for i, qid in enumerate(o.qids) if stats["answered"][i] >= min_attempts}
+    with open(bank_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fields = list(reader.fieldnames or [])
+        rows = list(reader)
+    if "difficulty" not in fields:
+        fields.append("difficulty")
+    updated = 0
+    for idx, r in enumerate(rows):
+        qid = f"{bank}:{r.get('id') or idx + 1}"
+        if qid in diff:
+            r["difficulty"] = f"{diff[qid]:.3f}"
+            updated += 1
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fields, quoting=csv.QUOTE_ALL, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(rows)
+    os.replace(tmp, out_path)
+    return updated
+
+# ---------- CLI ----------
+def _synthetic(n, n_questions=5000, n_sections=6, seed=1):
+    rng = np.random.default_rng(seed)
+    question = rng.integers(0, n_questions, n, dtype=np.int32)
+    ease = rng.uniform(0.1, 0.95, n_questions)
+    result = (rng.random(n) < ease[question]).astype(np.int8)
+    result[rng.random(n) < 0.05] = UNANSWERED
+    return Outcomes(question, (question % n_sections).astype(np.int32), rng.integers(0, 2, n, dtype=np.int8),
+                    (np.arange(n) // 60).astype(np.int32), rng.gamma(2.0, 1.5, n).astype(np.float32),
+                    result, result == UNANSWERED, [str(i) for i in range(n_questions)],
+                    [f"S{i}" for i in range(n_sections)])
+
+def _print_table(names, stats, rows):
+    print(f"{'':40} {'resp':>6} {'acierto':>8} {'buzz p50':>9} {'p90':>6} {'discr':>6}")
+    for i in rows:
+        print(f"{str(names[i])[:40]:40} {stats['answered'][i]:6d} {stats['p_correct'][i]:8.2f} "
+              f"{stats['buzz_median'][i]:9.2f} {stats['buzz_p90'][i]:6.2f} {stats['discrimination'][i]:6.2f}")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Analítica de preguntas para calibrar dificultad")
+    parser.add_argument("logs", nargs="*", help="logs de partidas (.qlog) o caché .npz")
+    parser.add_argument("--bank", nargs="+", default=["questions.csv"], help="bancos: archivos CSV o carpetas")
+    parser.add_argument("--cache", help="guardar los resultados ingresados en este .npz")
+    parser.add_argument("--export", help="escribir el banco con la columna difficulty en esta ruta "
+                                             "(una carpeta si hay varios bancos)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--bench", type=int, help="medir el cálculo con N intentos sintéticos")
+    args = parser.parse_args()
+
+    if args.bench:
+        o = _synthetic(args.bench)
+        t0 = time.perf_counter()
+        q, s = question_stats(o), section_stats(o)
+        print(f"{len(o)} intentos: métricas por pregunta y sección en {time.perf_counter() - t0:.2f} s")
+        raise SystemExit
+
+    t0 = time.perf_counter()
+    if len(args.logs) == 1 and args.logs[0].endswith(".npz"):
+        o = Outcomes.load(args.logs[0])
+    else:
+        try:
+            sections, names = bank_sections(args.bank)
+        except ValueError as e:
+            parser.error(str(e))
+        o = Outcomes.from_logs(args.logs, sections, names)
+    t1 = time.perf_counter()
+    if args.cache:
+        o.save(args.cache)
+    q, s = question_stats(o), section_stats(o)
+    t2 = time.perf_counter()
+    print(f"{len(o)} intentos ({t1 - t0:.2f} s ingreso, {t2 - t1:.2f} s métricas)\n")
+
+    print("Por sección:")
+    _print_table(o.sections, s, range(len(o.sections)))
+    print("\nMás difíciles:")
+    enough = np.flatnonzero(q["answered"] >= MIN_ATTEMPTS)
+    _print_table(o.qids, q, enough[np.argsort(-q["difficulty"][enough])][:args.top])
+    print("\nMás fáciles:")
+    _print_table(o.qids, q, enough[np.argsort(q["difficulty"][enough])][:args.top])
+    flagged = flag_suspicious(q)
+    if len(flagged):
+        print("\nRevisar el valor 'correct' de:")
+        _print_table(o.qids, q, flagged)
+
+    if args.export:
+        files = expand_bank_paths(args.bank)
+        if len(files) > 1 and not os.path.isdir(args.export):
+            parser.error("con varios bancos, --export debe ser una carpeta")
+        try:
+            names = bank_names(files)
+        except ValueError as e:
+            parser.error(str(e))
+        for path, name in zip(files, names):
+            out = os.path.join(args.export, path.name) if os.path.isdir(args.export) else args.export
+            n = export_difficulty(str(path), name, out, o, q)
+            print(f"\nDificultad exportada para {n} preguntas en {out}")
@@ -0,0 +1,135 @@
+# coding: utf-8
+"""
+Carga de bancos de preguntas (CSV), sin dependencias de Qt.
+
+- Varios bancos (archivos CSV o carpetas con CSV) se leen en paralelo en un
+  pool de procesos (leer CSV es CPU y con hilos el GIL lo serializa) y se
+  unen en un solo índice. Las filas vuelven al proceso principal como dicts
+  serializados; con un solo archivo, o si los bancos son chicos (arrancar un
+  proceso cuesta ~0.3 s), se leen directo en este proceso.
+- Los ids quedan con espacio de nombres `banco:id` (banco = nombre del
+  archivo sin extensión), así questions.csv y questions2.csv pueden tener
+  los mismos números sin chocar en used_ids; cada pregunta guarda además
+  de dónde salió (`bank`, `source`). Dos bancos con el mismo nombre de
+  archivo (en carpetas distintas) no se aceptan.
+- Columna opcional `image` (o `imagen`): ruta a un diagrama/foto; relativa
+  a la carpeta del CSV.
+"""
+import csv, multiprocessing, os, random, sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+def load_csv_questions(path, bank=None, shuffle=True):
+    rows = []
+    p = Path(path)
+    if not p.exists():
+        return rows
+    source = str(p)
+    try:
+        with p.open(newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for idx, r in enumerate(reader):
+                qid = r.get("id") or str(idx+1)
+                section = (r.get("section") or r.get("categoria") or "").strip()
+                question = (r.get("question") or r.get("pregunta") or "").strip()
+                opts = [
+                    (r.get("option1") or r.get("A") or "").strip(),
+                    (r.get("option2") or r.get("B") or "").strip(),
+                    (r.get("option3") or r.get("C") or "").strip(),
+                    (r.get("option4") or r.get("D") or "").strip(),
+                ]
+                correct = (r.get("correct") or r.get("answer") or r.get("respuesta") or "").strip()
+                try:
+                    difficulty = float(r.get("difficulty") or r.get("dificultad") or "")
+                except ValueError:
+                    difficulty = None
+                # imagen opcional; las rutas relativas son relativas al CSV
+                image = (r.get("image") or r.get("imagen") or "").strip()
+                if image and not Path(image).is_absolute():
+                    image = str(p.parent / image)
+
+                if question:
+                    # textos repetidos (sección, opciones) como un solo objeto: menos
+                    # memoria y menos bytes al pasar las filas entre procesos
+                    row = {
+                        "id": f"{bank}:{qid}" if bank else str(qid),
+                        "section": sys.intern(section),
+                        "question": question,
+                        "options": [sys.intern(o) for o in opts],
+                        "correct": sys.intern(correct),
+                        "difficulty": difficulty
+                    }
+                    if image:
+                        row["image"] = image
+                    if bank:
+                        row["bank"] = bank
+                        row["source"] = source
+                    rows.append(row)
+    except Exception as e:
+        print("Error loading CSV:", e)
+
+    if shuffle:
+        random.shuffle(rows)
+    return rows
+
+def expand_bank_paths(paths):
+    """Archivos tal cual; carpetas -> sus *.csv en orden alfabético."""
+    out = []
+    for p in paths:
+        p = Path(p)
+        if p.is_dir():
+            out.extend(sorted(p.glob("*.csv")))
+        else:
+            out.append(p)
+    return out
+
+def bank_names(files):
+    """Nombre de banco por archivo: el nombre sin extensión. No depende del orden
+    de carga (los ids quedan en state.json y en los logs), así que dos archivos
+    con el mismo nombre son un error (ValueError) en vez de renumerarse."""
+    names, seen = [], {}
+    for f in files:
+        name = Path(f).stem.replace(":", "_")
+        if name in seen:
+            raise ValueError(f"dos bancos se llamarían '{name}': {seen[name]} y {f} "
+                             "(renombra uno de los archivos)")
+        seen[name] = f
+        names.append(name)
+    return names
+
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024 # debajo de esto no vale la pena arrancar procesos
+
+def _load_one(file_and_bank):
+    return load_csv_questions(file_and_bank[0], bank=file_and_bank[1], shuffle=False)
+
+def load_banks(paths, max_workers=None):
+    """Lee todos los bancos en paralelo. Devuelve (preguntas, índice id -> pregunta, nombres de banco)."""
+    files = expand_bank_paths(paths)
+    names = bank_names(files)
+    jobs = list(zip(files, names))
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    parts = None
+    total = sum(f.stat().st_size for f in files if f.exists())
+    if workers > 1 and total >= PARALLEL_MIN_BYTES:
+        try:
+            # spawn: no se hace fork de un proceso con hilos de Qt/servidores corriendo
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                parts = list(pool.map(_load_one, jobs))
+        except Exception as e:
+            print("Error loading banks in parallel, loading one by one:", e)
+    if parts is None:
+        parts = [_load_one(job) for job in jobs]
+    questions = [q for part in parts for q in part]
+    random.shuffle(questions)
+    index = {q["id"]: q for q in questions}
+    return questions, index, names
+
+def namespace_id(qid, banks):
+    """Ids viejos sin banco (state.json / logs anteriores) -> `banco:id` del primer
+    banco de `banks`. Un id ya tiene banco solo si el prefijo es uno de `banks`: un
+    id propio del CSV con ':' (p. ej. "Q:12") también se completa."""
+    qid = str(qid)
+    bank, sep, _ = qid.partition(":")
+    if not banks or (sep and bank in banks):
+        return qid
+    return f"{banks[0]}:{qid}"
@@ -0,0 +1,186 @@
+# coding: utf-8
+"""
+Render offscreen para la señal de programa (TV).
+
+- El presentador publica el estado en memoria compartida (display.SharedSnapshot)
+  y un proceso de render aparte lo lee en cada frame; así el render nunca
+  compite con la ventana del operador (ni por el GIL).
+- El proceso de render dibuja la tarjeta, el reloj y el marcador (el mismo
+  dibujo de las pantallas del público, display.paint_scene) a fps fijos
+  sobre un anillo de QImage reutilizables, sin ventana (plataforma offscreen).
+- Un hilo escritor entrega cada frame crudo (RGBA) al sink: un archivo o la
+  entrada estándar de un encoder local. Si el sink va lento y no hay un
+  buffer libre, el frame se descarta y se cuenta.
+
+Ejemplos de destino (--broadcast):
+  programa.rgba
+  "|ffmpeg -f rawvideo -pix_fmt rgba -s {w}x{h} -r {fps} -i - -c:v libx264 programa.mp4"
+"""
+import sys, os, queue, shlex, signal, subprocess, threading, time
+from PySide6.QtGui import QGuiApplication, QImage, QPainter
+from display import SharedSnapshot, paint_scene, self_command
+
+# ---------- sinks ----------
+class FileSink:
+    """Escribe los frames crudos uno tras otro en un archivo."""
+    def __init__(self, path):
+        self.f = open(path, "wb", buffering=1 << 20)
+
+    def write(self, data):
+        self.f.write(data)
+
+    def close(self):
+        self.f.close()
+
+class PipeSink:
+    """Envía los frames crudos a la entrada estándar de un proceso (encoder)."""
+    def __init__(self, command):
+        self.proc = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE)
+
+    def write(self, data):
+        self.proc.stdin.write(data)
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        self.proc.wait()
+
+def make_sink(target, width, height, fps):
+    """'|comando' -> PipeSink (con {w}, {h}, {fps} sustituidos); otro -> FileSink."""
+    if target.startswith("|"):
+        return PipeSink(target[1:].format(w=width, h=height, fps=fps))
+    return FileSink(target)
+
+# ---------- lado presentador ----------
+class BroadcastLink:
+    """Lanza el proceso de render y le publica cada cambio de estado."""
+    def __init__(self, target, width=1920, height=1080, fps=30, card_bg=None):
+        self.snapshot = SharedSnapshot()
+        cmd = self_command() + ["--broadcast-render", self.snapshot.name, "--broadcast", target,
+                                "--broadcast-size", f"{width}x{height}", "--broadcast-fps", str(fps)]
+        if card_bg:
+            cmd += ["--card_bg", str(card_bg)]
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+        # cerrar su stdin es la señal de parada (funciona igual en Windows)
+        self.proc = subprocess.Popen(cmd, env=env, stdin=subprocess.PIPE)
+
+    def __call__(self, event, state):
+        self.snapshot.write(state)
+
+    def close(self):
+        # el render termina el frame en curso, cierra el sink y reporta sus estadísticas
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+        self.snapshot.close()
+
+# ---------- proceso de render ----------
+class BroadcastRenderer:
+    def __init__(self, snapshot, sink, width=1920, height=1080, fps=30, ring=4, banner_path=None):
+        self.snapshot = snapshot
+        self.sink = sink
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.banner = QImage(banner_path) if banner_path and os.path.exists(banner_path) else None
+        self.state = None
+        self.seq = -1
+        self.stopped = threading.Event()
+
+        # anillo de buffers: libres -> render -> listos -> sink -> libres
+        self.frames = [QImage(width, height, QImage.Format_RGBA8888) for _ in range(ring)]
+        self._free = queue.Queue()
+        self._ready = queue.Queue()
+        for i in range(ring):
+            self._free.put(i)
+
+        # estadísticas
+        self.rendered = 0
+        self.written = 0
+        self.dropped = 0
+        self.render_total = 0.0
+        self.render_max = 0.0
+
+    def stats_line(self):
+        avg = self.render_total / self.rendered * 1000 if self.rendered else 0.0
+        return (f"Broadcast {self.width}x{self.height}@{self.fps}: {self.rendered} frames, "
+                f"{self.dropped} descartados, render medio {avg:.1f} ms, máx {self.render_max * 1000:.1f} ms")
+
+    def run(self):
+        writer = threading.Thread(target=self._sink_loop, name="broadcast-sink", daemon=True)
+        writer.start()
+        period = 1.0 / self.fps
+        next_t = time.perf_counter()
+        last_report = next_t
+        while not self.stopped.is_set():
+            now = time.perf_counter()
+            if now < next_t:
+                time.sleep(next_t - now)
+                now = time.perf_counter()
+            # si nos atrasamos más de un frame, esos frames se pierden
+            late = int((now - next_t) / period)
+            if late:
+                self.dropped += late
+                next_t += late * period
+            next_t += period
+
+            try:
+                slot = self._free.get_nowait()
+            except queue.Empty:
+                self.dropped += 1 # el sink no devolvió ningún buffer a tiempo
+                continue
+
+            if self.snapshot.seq() != self.seq:
+                seq, state = self.snapshot.read()
+                if state is not None:
+                    self.seq, self.state = seq, state
+            t0 = time.perf_counter()
+            img = self.frames[slot]
+            p = QPainter(img)
+            paint_scene(p, self.width, self.height, self.state, time.time(), self.banner)
+            p.end()
+            dt = time.perf_counter() - t0
+            self.rendered += 1
+            self.render_total += dt
+            self.render_max = max(self.render_max, dt)
+            self._ready.put((slot, img.constBits()))
+
+            if now - last_report >= 10:
+                print(self.stats_line(), flush=True)
+                last_report = now
+
+        self._ready.put(None)
+        writer.join(timeout=5)
+        self.sink.close()
+        print(self.stats_line(), flush=True)
+
+    def _sink_loop(self):
+        while True:
+            item = self._ready.get()
+            if item is None:
+                return
+            slot, data = item
+            try:
+                self.sink.write(data)
+                self.written += 1
+            except (OSError, ValueError) as e:
+                print("Error escribiendo frame de broadcast:", e)
+                self.stopped.set()
+                return
+            finally:
+                self._free.put(slot)
+
+def run_broadcast(shm_name, target, width, height, fps, card_bg=None):
+    app = QGuiApplication(sys.argv) # necesario para fuentes; no se abre ninguna ventana
+    snapshot = SharedSnapshot(shm_name)
+    renderer = BroadcastRenderer(snapshot, make_sink(target, width, height, fps), width, height, fps,
+                                 banner_path=card_bg)
+    signal.signal(signal.SIGINT, lambda *a: renderer.stopped.set())
+    threading.Thread(target=lambda: (sys.stdin.read(), renderer.stopped.set()), daemon=True).start()
+    renderer.run()
+    snapshot.close()
+    return 0
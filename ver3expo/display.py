@@ -0,0 +1,312 @@
+# coding: utf-8
+"""
+Modo pantalla dividida: consola del presentador + pantallas del público.
+
+- El proceso del presentador (QuizWindow) publica una instantánea del estado
+  en memoria compartida (seqlock: contador impar mientras se escribe) y avisa
+  a cada pantalla con un datagrama UDP local con el número de secuencia.
+- Cada pantalla del público es un proceso aparte con su propia ventana a
+  pantalla completa; repinta a su ritmo (60 fps mientras corre el reloj),
+  interpolando la barra de tiempo, así que los diálogos modales o el trabajo
+  del presentador no congelan lo que se proyecta.
+"""
+import sys, os, json, socket, struct, subprocess, time
+from multiprocessing import shared_memory
+from PySide6.QtCore import Qt, QTimer, QRectF
+from PySide6.QtGui import QFont, QColor, QPainter, QImage, QLinearGradient, QPen
+from PySide6.QtWidgets import QApplication, QWidget
+from PySide6.QtNetwork import QUdpSocket, QHostAddress
+
+SNAPSHOT_SIZE = 64 * 1024
+FRAME_MS = 16 # ~60 fps
+
+# ---------- Estado compartido ----------
+class SharedSnapshot:
+    """Instantánea JSON en memoria compartida protegida por un seqlock."""
+    HEADER = struct.Struct("<QI") # secuencia, longitud del payload
+    READ_RETRIES = 8 # lecturas por frame antes de rendirse hasta el próximo repintado
+
+    def __init__(self, name=None, size=SNAPSHOT_SIZE):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+            self.HEADER.pack_into(self.shm.buf, 0, 0, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+            _untrack(self.shm)
+        self.name = self.shm.name
+        self._seq = 0
+
+    def write(self, state):
+        payload = json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if self.HEADER.size + len(payload) > self.shm.size:
+            print("Snapshot demasiado grande para la memoria compartida:", len(payload))
+            return self._seq
+        buf = self.shm.buf
+        # secuencia impar = escritura en curso
+        self.HEADER.pack_into(buf, 0, self._seq + 1, 0)
+        buf[self.HEADER.size:self.HEADER.size + len(payload)] = payload
+        self._seq += 2
+        self.HEADER.pack_into(buf, 0, self._seq, len(payload))
+        return self._seq
+
+    def seq(self):
+        return self.HEADER.unpack_from(self.shm.buf, 0)[0]
+
+    def read(self):
+        """Devuelve (seq, estado) consistente, o (seq, None) si aún no hay datos."""
+        buf = self.shm.buf
+        for attempt in range(self.READ_RETRIES):
+            if attempt:
+                time.sleep(0) # cede el GIL/CPU al escritor en vez de girar en vacío
+            seq1, length = self.HEADER.unpack_from(buf, 0)
+            if seq1 & 1:
+                continue
+            data = bytes(buf[self.HEADER.size:self.HEADER.size + length])
+            if self.HEADER.unpack_from(buf, 0)[0] == seq1:
+                break
+        else:
+            return -1, None # escritor a medias (¿murió?); se reintenta en el próximo frame
+        if not length:
+            return seq1, None
+        return seq1, json.loads(data.decode("utf-8"))
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+def _untrack(shm):
+    # Antes de Python 3.13 el resource_tracker del proceso que solo se adjunta
+    # borraría el segmento al salir; el dueño es el proceso del presentador.
+    if os.name != "nt":
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+
+def _free_udp_port():
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+# ---------- Lado presentador ----------
+class AudienceLink:
+    """Lanza las pantallas del público y les publica cada cambio de estado."""
+    def __init__(self, count, card_bg=None):
+        self.snapshot = SharedSnapshot()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.ports = []
+        self.procs = []
+        for i in range(count):
+            port = _free_udp_port()
+            cmd = self_command() + ["--display", self.snapshot.name, "--notify-port", str(port), "--screen", str(i + 1)]
+            if card_bg:
+                cmd += ["--card_bg", str(card_bg)]
+            self.ports.append(port)
+            self.procs.append(subprocess.Popen(cmd))
+
+    def __call__(self, event, state):
+        seq = self.snapshot.write(state)
+        msg = struct.pack("<Q", seq)
+        for port in self.ports:
+            try:
+                self.sock.sendto(msg, ("127.0.0.1", port))
+            except OSError:
+                pass # la pantalla sigue leyendo la secuencia en cada frame
+
+    def close(self):
+        for p in self.procs:
+            p.terminate()
+        for p in self.procs:
+            try:
+                p.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        self.sock.close()
+        self.snapshot.close()
+
+def self_command():
+    if getattr(sys, "frozen", False): # ejecutable de PyInstaller
+        return [sys.executable]
+    return [sys.executable, os.path.abspath(sys.argv[0])]
+
+# ---------- Dibujo de la escena ----------
+BG = QColor("#0b0b0b")
+OPTION_BG = QColor("#2B2B2B")
+OPTION_OK = QColor("#1FB954")
+TEAM_BG = QColor("#d33a2a")
+TEAM_ACTIVE = QColor("#ff8a65")
+
+def countdown_fraction(state, now):
+    """Fracción restante de la barra, interpolada entre ticks del reloj."""
+    total = max(1, state.get("seconds_per_question") or 1)
+    remaining = state.get("remaining", total)
+    if state.get("timer_running"):
+        elapsed = now - (state.get("tick_at") or now)
+        remaining = max(remaining - elapsed, remaining - 1, 0)
+    return max(0.0, min(1.0, remaining / total))
+
+_banner_cache = {}
+
+def _scaled_banner(banner, height):
+    # escalar una vez por tamaño, no en cada frame
+    key = (banner.cacheKey(), height)
+    img = _banner_cache.get(key)
+    if img is None:
+        _banner_cache.clear()
+        img = _banner_cache[key] = banner.scaledToHeight(height, Qt.SmoothTransformation)
+    return img
+
+def paint_scene(p, w, h, state, now, banner=None):
+    """Dibuja tarjeta, opciones, reloj y marcador. Sirve para ventanas y QImage."""
+    p.setRenderHint(QPainter.Antialiasing)
+    p.setRenderHint(QPainter.TextAntialiasing)
+    p.fillRect(0, 0, w, h, BG)
+    if not state:
+        return
+    m = w * 0.03
+
+    # reloj: barra larga + número
+    bar = QRectF(m, m, w - 2 * m - w * 0.08, h * 0.035)
+    p.setPen(Qt.NoPen)
+    p.setBrush(OPTION_BG)
+    p.drawRoundedRect(bar, bar.height() / 2, bar.height() / 2)
+    frac = countdown_fraction(state, now)
+    if frac > 0:
+        grad = QLinearGradient(bar.topLeft(), bar.topRight())
+        grad.setColorAt(0, QColor("#ff8a65"))
+        grad.setColorAt(1, QColor("#ff3b30"))
+        p.setBrush(grad)
+        p.drawRoundedRect(QRectF(bar.x(), bar.y(), bar.width() * frac, bar.height()), bar.height() / 2, bar.height() / 2)
+    p.setPen(QColor("#f3f3f3"))
+    p.setFont(QFont("Helvetica", max(10, int(h * 0.035)), QFont.Bold))
+    p.drawText(QRectF(bar.right(), bar.y() - h * 0.02, w - m - bar.right(), bar.height() + h * 0.04),
+               Qt.AlignCenter, str(state.get("remaining", "")))
+
+    y = bar.bottom() + h * 0.02
+    if banner is not None and not banner.isNull():
+        bh = h * 0.14
+        img = _scaled_banner(banner, int(bh))
+        p.drawImage(int((w - img.width()) / 2), int(y), img)
+        y += bh + h * 0.02
+
+    # tarjeta de la pregunta
+    card = QRectF(m * 2, y, w - 4 * m, h * 0.30)
+    p.setPen(QPen(QColor("#d33a2a"), 3))
+    p.setBrush(QColor(255, 255, 255, 235))
+    p.drawRoundedRect(card, 12, 12)
+    p.setPen(QColor("#202020"))
+    p.setFont(QFont("Helvetica", max(12, int(h * 0.04)), QFont.Bold))
+    p.drawText(card.adjusted(20, 12, -20, -12), Qt.AlignCenter | Qt.TextWordWrap, state.get("text", ""))
+    if state.get("total"):
+        p.setFont(QFont("Helvetica", max(8, int(h * 0.018)), QFont.Bold))
+        p.setPen(QColor("#555"))
+        p.drawText(card.adjusted(0, 6, -12, 0), Qt.AlignRight | Qt.AlignTop, f"{state.get('index', 0)} / {state.get('total')}")
+    y = card.bottom() + h * 0.03
+
+    # opciones en grilla 2x2
+    opt_h = h * 0.08
+    gap = w * 0.015
+    opt_w = (w - 4 * m - gap) / 2
+    correct_idx = state.get("correct_index") if state.get("revealed") else None
+    p.setFont(QFont("Helvetica", max(10, int(h * 0.026)), QFont.Bold))
+    for i, opt in enumerate(state.get("options") or []):
+        r = QRectF(m * 2 + (i % 2) * (opt_w + gap), y + (i // 2) * (opt_h + gap), opt_w, opt_h)
+        ok = correct_idx == i
+        p.setPen(Qt.NoPen)
+        p.setBrush(OPTION_OK if ok else OPTION_BG)
+        p.drawRoundedRect(r, 8, 8)
+        p.setPen(QColor("white") if ok else QColor("#cfcfcf"))
+        if opt:
+            p.drawText(r.adjusted(12, 0, -12, 0), Qt.AlignCenter | Qt.TextWordWrap, f"{chr(65 + i)}) {opt}")
+    y += 2 * opt_h + gap + h * 0.03
+
+    # marcador
+    teams = state.get("teams") or {}
+    box_w = (w - 4 * m - gap) / 2
+    box_h = min(h * 0.14, h - y - m)
+    for i, key in enumerate(("A", "B")):
+        t = teams.get(key) or {}
+        r = QRectF(m * 2 + i * (box_w + gap), y, box_w, box_h)
+        p.setPen(Qt.NoPen)
+        p.setBrush(TEAM_ACTIVE if state.get("active_team") == key else TEAM_BG)
+        p.drawRoundedRect(r, 8, 8)
+        p.setPen(QColor("white"))
+        p.setFont(QFont("Helvetica", max(10, int(h * 0.03)), QFont.Bold))
+        p.drawText(r.adjusted(0, 4, 0, -box_h / 2), Qt.AlignCenter, t.get("name", key))
+        p.setFont(QFont("Helvetica", max(9, int(h * 0.022))))
+        p.drawText(r.adjusted(0, box_h / 2, 0, -4), Qt.AlignCenter,
+                   f"Correctas: {t.get('correct', 0)} Erradas: {t.get('wrong', 0)}")
+
+# ---------- Lado público ----------
+class AudienceWindow(QWidget):
+    def __init__(self, shm_name, notify_port, card_bg=None):
+        super().__init__()
+        self.setWindowTitle("Quiz Tournament - Público")
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.snapshot = SharedSnapshot(shm_name)
+        self.seq = -1
+        self.state = None
+        self.banner = QImage(card_bg) if card_bg and os.path.exists(card_bg) else None
+
+        # canal de aviso: datagramas con la secuencia nueva
+        self.sock = QUdpSocket(self)
+        self.sock.bind(QHostAddress.LocalHost, notify_port)
+        self.sock.readyRead.connect(self._on_notify)
+
+        # reloj de frames propio; también revisa la secuencia por si se pierde un aviso
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setTimerType(Qt.PreciseTimer)
+        self.frame_timer.setInterval(FRAME_MS)
+        self.frame_timer.timeout.connect(self._frame)
+        self.frame_timer.start()
+
+    def _on_notify(self):
+        while self.sock.hasPendingDatagrams():
+            self.sock.receiveDatagram()
+        self._pull()
+
+    def _pull(self):
+        if self.snapshot.seq() == self.seq:
+            return False
+        self.seq, state = self.snapshot.read()
+        if state is not None:
+            self.state = state
+        return True
+
+    def _frame(self):
+        changed = self._pull()
+        if changed or (self.state and self.state.get("timer_running")):
+            self.update()
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        paint_scene(p, self.width(), self.height(), self.state, time.time(), self.banner)
+        p.end()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.showNormal()
+
+    def closeEvent(self, event):
+        self.frame_timer.stop()
+        self.snapshot.close()
+        super().closeEvent(event)
+
+def run_display(shm_name, notify_port, screen=1, card_bg=None):
+    app = QApplication(sys.argv)
+    win = AudienceWindow(shm_name, notify_port, card_bg)
+    screens = app.screens()
+    target = screens[screen] if screen < len(screens) else screens[-1]
+    win.setGeometry(target.geometry())
+    win.showFullScreen()
+    return app.exec()
@@ -12,8 +12,19 @@ Quiz Tournament - PySide6 (final integrado)
 - Diálogo con checkboxes para elegir categorías (incluye opción TODAS)
 - Persistencia: guarda preguntas usadas en state.json para evitar repeticiones
 - SONIDOS: Añadido sonido de tick y timeout al reloj.
+- WATCHDOG: registra en stalls.log los bloqueos del event loop (--watchdog-ms)
+- PANTALLAS: --displays N abre N pantallas del público en procesos aparte
+- MARCADOR: --scoreboard-port P sirve el marcador por HTTP/WebSocket en la red local
+- BROADCAST: --broadcast DESTINO genera la señal de programa offscreen (archivo o encoder)
+- REGISTRO: cada evento de la partida se anexa a partidas.qlog (ver matchlog.py)
+- SORTEO: cuotas por sección y bandas de dificultad, ponderado por antigüedad (sampler.py)
+- REANUDAR: la ronda en curso se guarda en cada transición y se ofrece retomarla al abrir
+- BANCOS: --file acepta varios CSV o carpetas; se cargan en paralelo con ids banco:id
+- INFORMES: al terminar cada ronda se genera en segundo plano el informe CSV/HTML (reports/)
+- IMÁGENES: columna opcional 'image' en el banco; se decodifican por adelantado en otro hilo (media.py)
+- ESCENARIOS: --arenas N abre N partidas independientes que comparten banco y usadas (pool.py)
 """
-import sys, os, csv, random, json
+import sys, os, time
 from pathlib import Path
 from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtCore import Qt, QTimer
@@ -25,6 +36,15 @@ from PySide6.QtWidgets import (
     QGraphicsDropShadowEffect
 )
 from PySide6.QtMultimedia import QSoundEffect # <-- IMPORTACIÓN NECESARIA PARA SONIDO
+from stall_watchdog import StallWatchdog
+from display import AudienceLink, run_display
+from scoreboard import ScoreboardServer
+from broadcast import BroadcastLink, run_broadcast
+import matchlog
+from resume import RoundSnapshot
+from pool import QuestionPool, arena_file
+from reports import ReportWorker
+from media import MediaCache
 
 # ---------- Helpers ----------
 def resource_path(rel):
@@ -35,40 +55,6 @@ def resource_path(rel):
         base = os.path.abspath(".")
     return os.path.join(base, rel)
 
-def load_csv_questions(path):
-    rows = []
-    p = Path(path)
-    if not p.exists():
-        return rows
-    try:
-        with p.open(newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for idx, r in enumerate(reader):
-                qid = r.get("id") or str(idx+1)
-                section = (r.get("section") or r.get("categoria") or "").strip()
-                question = (r.get("question") or r.get("pregunta") or "").strip()
-                opts = [
-                    (r.get("option1") or r.get("A") or "").strip(),
-                    (r.get("option2") or r.get("B") or "").strip(),
-                    (r.get("option3") or r.get("C") or "").strip(),
-                    (r.get("option4") or r.get("D") or "").strip(),
-                ]
-                correct = (r.get("correct") or r.get("answer") or r.get("respuesta") or "").strip()
-                
-                if question:
-                    rows.append({
-                        "id": str(qid),
-                        "section": section,
-                        "question": question,
-                        "options": opts,
-                        "correct": correct
-                    })
-    except Exception as e:
-        print("Error loading CSV:", e)
-    
-    random.shuffle(rows)
-    return rows
-
 # ---------- Category Dialog ----------
 class CategoryDialog(QtWidgets.QDialog):
     def __init__(self, sections, parent=None):
@@ -134,27 +120,28 @@ class CategoryDialog(QtWidgets.QDialog):
 
 # ---------- Main Window ----------
 class QuizWindow(QMainWindow):
-    def __init__(self, csv_file="questions.csv", card_bg="imgs/olimpiada.png"):
+    def __init__(self, pool, card_bg="imgs/olimpiada.png", arena=None, media=None):
         super().__init__()
-        self.setWindowTitle("Quiz Tournament - Rondas (15 preguntas)")
+        self.arena = arena # número de escenario (None = uno solo)
+        title = "Quiz Tournament - Rondas (15 preguntas)"
+        self.setWindowTitle(f"{title} - Escenario {arena}" if arena else title)
         self.resize(1200, 740)
         
         # config
-        self.csv_file = Path(csv_file)
+        self.pool = pool # banco y registro de usadas, compartidos entre escenarios
         self.card_bg_path = Path(card_bg)
         self.per_round = 60 # preguntas por ronda
         self.seconds_per_question = 1 # valor por defecto de tiempo
         
         # state
-        self.all_questions = []
-        self.remaining_questions = []
         self.current_round = []
         self.current_index = -1
         self.timer_running = False
         self.remaining_seconds = 0
+        self.tick_at = 0.0 # time.time() del último tick (para interpolar la barra)
+        self.revealed = False
         
         # sections
-        self.sections = []
         self.selected_categories = ["TODAS"]
         
         # teams
@@ -166,9 +153,23 @@ class QuizWindow(QMainWindow):
         self.teamB_correct = 0
         self.teamB_wrong = 0
         
-        # state file (persistencia)
-        self.state_file = Path("state.json")
-        self.used_ids = set() # ids de preguntas ya usadas (persistidas)
+        # registro binario de eventos de la partida (uno por escenario)
+        self.match_log = matchlog.MatchLog(str(arena_file("partidas.qlog", arena)))
+        
+        # instantánea de la ronda en curso (para reanudar tras un cierre inesperado)
+        self.round_snapshot = RoundSnapshot(arena_file("round.json", arena), arena_file("round_state.json", arena))
+        
+        # informes de ronda y de torneo (se generan en un hilo aparte)
+        self.reports = ReportWorker(arena_file("reports", arena))
+        
+        # imágenes de las preguntas (decodificadas en otro hilo, caché LRU acotada);
+        # con varios escenarios la caché es una sola y el tope no crece
+        self.prefetch_ahead = 3 # preguntas siguientes cuya imagen se prepara
+        self.media = media or MediaCache(parent=self)
+        self.media.loaded.connect(self._on_image_loaded)
+        
+        # oyentes del estado (pantallas del público, etc.): callable(evento, snapshot)
+        self.state_listeners = []
         
         # team button styles
         self.team_default_style = "background: #d33a2a; color: white; border-radius: 8px; padding: 8px 12px;"
@@ -187,13 +188,14 @@ class QuizWindow(QMainWindow):
         # build UI
         self._build_ui()
         
-        # load CSV + state
-        self._load_questions()
         self._refresh_ui()
         
         # shortcuts
         QtGui.QShortcut(QtGui.QKeySequence("N"), self).activated.connect(self.next_question)
         QtGui.QShortcut(QtGui.QKeySequence("S"), self).activated.connect(self.manual_stop_timer)
+        
+        # ¿quedó una ronda a medias?
+        QTimer.singleShot(0, self._offer_resume)
 
     # ---------- UI ----------
     def _build_ui(self):
@@ -307,6 +309,13 @@ class QuizWindow(QMainWindow):
 
         card_layout.addLayout(wrapper)
         
+        # imagen de la pregunta (solo si la pregunta trae una)
+        self.lbl_image = QLabel()
+        self.lbl_image.setAlignment(Qt.AlignCenter)
+        self.lbl_image.setMaximumHeight(self.media.box.height())
+        self.lbl_image.hide()
+        card_layout.addWidget(self.lbl_image)
+        
         # añadir card dentro del contenedor con margen y glow
         wrap_layout.addWidget(self.card)
         
@@ -498,31 +507,96 @@ class QuizWindow(QMainWindow):
             }
         """)
 
-    # ---------- support methods (persistence) ----------
-    def _load_state(self):
-        """Carga used_ids desde state.json (si existe)."""
-        try:
-            if self.state_file.exists():
-                data = json.loads(self.state_file.read_text(encoding="utf-8"))
-                used = data.get("used", [])
-                if isinstance(used, list):
-                    self.used_ids = set(str(x) for x in used)
-                else:
-                    self.used_ids = set()
+    # ---------- support methods (resume) ----------
+    def _save_round_snapshot(self):
+        """Parte fija de la ronda: se escribe una vez al generarla."""
+        self.round_snapshot.save_round(f"{time.time():.6f}", {
+            "questions": self.current_round,
+            "teamA": self.teamA_name,
+            "teamB": self.teamB_name,
+            "categories": self.selected_categories,
+            "seconds_per_question": self.seconds_per_question,
+        })
+        self._save_progress()
+
+    def _save_progress(self):
+        """Parte variable de la ronda: se reescribe en cada transición."""
+        self.round_snapshot.save_state({
+            "index": self.current_index,
+            "revealed": self.revealed,
+            "active_team": self.active_team,
+            "scores": [self.teamA_correct, self.teamA_wrong, self.teamB_correct, self.teamB_wrong],
+            "remaining": self.remaining_seconds,
+            "timer_running": self.timer_running,
+        })
+
+    def _offer_resume(self):
+        snap = self.round_snapshot.load()
+        if not snap:
+            return
+        rnd, st = snap
+        total = len(rnd["questions"])
+        where = (f"pregunta {st['index'] + 1} de {total}" if st["index"] >= 0
+                 else f"ronda sin empezar ({total} preguntas)")
+        def answer(resp):
+            if resp == QMessageBox.Yes:
+                self._restore_round(rnd, st)
             else:
-                self.used_ids = set()
-        except Exception as e:
-            print("Error reading state.json:", e)
-            self.used_ids = set()
+                self.round_snapshot.clear()
+        self._ask("Reanudar ronda",
+                  f"Hay una ronda sin terminar: {rnd['teamA']} vs {rnd['teamB']}, "
+                  f"{where}.\n¿Deseas retomarla donde quedó?",
+                  QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes, answer)
+
+    def _restore_round(self, rnd, st):
+        """Restaura la ronda desde la instantánea (sin volver a leer el banco)."""
+        self.teamA_name = rnd["teamA"]
+        self.teamB_name = rnd["teamB"]
+        self.selected_categories = rnd.get("categories") or ["TODAS"]
+        self.seconds_per_question = rnd.get("seconds_per_question", self.seconds_per_question)
+        self.current_round = rnd["questions"]
+        self.pool.hold(self.arena or 1, [q["id"] for q in self.current_round])
+        self.teamA_correct, self.teamA_wrong, self.teamB_correct, self.teamB_wrong = st["scores"]
+        self.current_index = st["index"]
+        self.active_team = st.get("active_team")
+        self.revealed = st.get("revealed", False)
+        self.remaining_seconds = st.get("remaining", self.seconds_per_question)
+        
+        # dejar constancia en el log: la ronda (con el marcador restaurado) y la pregunta actual,
+        # para que informes y analítica atribuyan bien lo que sigue
+        self.match_log.record(matchlog.RESUME, teamA=self.teamA_name, teamB=self.teamB_name,
+                              ids=[q["id"] for q in self.current_round],
+                              scores=list(st["scores"]), index=self.current_index)
+        if self.current_index >= 0:
+            self.match_log.record(matchlog.QUESTION, index=self.current_index,
+                                  qid=self.current_round[self.current_index]["id"])
+
+        if self.current_index < 0:
+            self.lbl_question.setText("Ronda generada.\nPulsa 'Siguiente pregunta'.")
+            self.media.prefetch(q.get("image") for q in self.current_round[:self.prefetch_ahead])
+        else:
+            q = self.current_round[self.current_index]
+            self._display_question(q)
+            if self.revealed:
+                self._show_answer(q)
+            if st.get("timer_running") and not self.active_team:
+                self.timer_running = True
+                self.tick_at = time.time()
+                self.timer.start()
+        
+        for team, btn in (("A", self.btn_teamA), ("B", self.btn_teamB)):
+            btn.setStyleSheet(self.team_selected_style if self.active_team == team else self.team_default_style)
+        can_mark = not self.timer_running and (self.revealed or self.active_team is not None)
+        self.btn_stop.setEnabled(self.timer_running)
+        self.btn_correct.setEnabled(can_mark)
+        self.btn_wrong.setEnabled(can_mark)
+        self._refresh_ui()
+        if self.current_index >= 0:
+            # _refresh_ui deja la barra llena cuando el timer no corre: volver al tiempo que quedaba
+            self.time_bar.setValue(self.remaining_seconds)
+            self.lbl_time_num.setText(str(self.remaining_seconds))
+        self._publish("resume")
 
-    def _save_state(self):
-        """Guarda used_ids en state.json"""
-        try:
-            data = {"used": sorted(list(self.used_ids))}
-            self.state_file.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-        except Exception as e:
-            print("Error writing state.json:", e)
-            
     # ---------- support methods (audio) ---------- # <-- NUEVA SECCIÓN PARA SONIDO
     def _load_sounds(self):
         """Carga los archivos de sonido usando resource_path."""
@@ -541,28 +615,6 @@ class QuizWindow(QMainWindow):
             print(f"Advertencia: Archivo de sonido timeout.wav no encontrado en {timeout_path}")
 
     # ---------- support methods ----------
-    def _load_questions(self):
-        qpath = self.csv_file
-        if not qpath.exists():
-            alt = Path(resource_path(str(self.csv_file)))
-            if alt.exists():
-                qpath = alt
-        
-        self.all_questions = load_csv_questions(qpath)
-        
-        # load saved state (used ids) and build remaining_questions
-        self._load_state()
-        
-        if self.used_ids:
-            # filter out used questions
-            self.remaining_questions = [q for q in self.all_questions if q.get("id") not in self.used_ids]
-        else:
-            self.remaining_questions = list(self.all_questions)
-
-        # populate sections
-        sections = sorted({(q.get("section") or "").strip() for q in self.all_questions if (q.get("section") or "").strip()})
-        self.sections = sections
-
     def _refresh_ui(self):
         total = len(self.current_round) if self.current_round else 0
         idx = max(0, self.current_index+1) if self.current_round else 0
@@ -584,27 +636,97 @@ class QuizWindow(QMainWindow):
             self.time_bar.setValue(self.seconds_per_question)
             self.lbl_time_num.setText(str(self.seconds_per_question))
 
+    # ---------- state publishing ----------
+    def _correct_index(self, q):
+        """Índice de la opción que coincide con 'correct' (o None)."""
+        correct = (q.get("correct") or "").strip().lower()
+        for i, opt in enumerate(q.get("options") or []):
+            if opt and correct and opt.strip().lower() == correct:
+                return i
+        return None
+
+    def _snapshot(self):
+        """Estado visible de la partida como dict serializable."""
+        q = None
+        if self.current_round and 0 <= self.current_index < len(self.current_round):
+            q = self.current_round[self.current_index]
+        return {
+            "text": self.lbl_question.text(),
+            "question_id": q["id"] if q else None,
+            "section": q.get("section", "") if q else "",
+            "options": list(q.get("options") or []) if q else [],
+            "revealed": self.revealed,
+            "correct_index": self._correct_index(q) if q and self.revealed else None,
+            "index": self.current_index + 1 if q else 0,
+            "total": len(self.current_round) if q else 0,
+            "teams": {
+                "A": {"name": self.teamA_name, "correct": self.teamA_correct, "wrong": self.teamA_wrong},
+                "B": {"name": self.teamB_name, "correct": self.teamB_correct, "wrong": self.teamB_wrong},
+            },
+            "active_team": self.active_team,
+            "timer_running": self.timer_running,
+            "remaining": self.remaining_seconds if q else self.seconds_per_question,
+            "seconds_per_question": self.seconds_per_question,
+            "tick_at": self.tick_at,
+        }
+
+    def _publish(self, event):
+        if not self.state_listeners:
+            return
+        state = self._snapshot()
+        for listener in self.state_listeners:
+            try:
+                listener(event, state)
+            except Exception as e:
+                print(f"Error publishing state ({event}):", e)
+
+    # ---------- dialogs ----------
+    # Los diálogos son modales solo para su ventana (open() + señal, nunca exec()
+    # ni los estáticos de QMessageBox): con varios escenarios, un diálogo abierto
+    # en uno no congela los controles de los demás.
+    def _open_window_modal(self, dlg):
+        dlg.setWindowModality(Qt.WindowModal)
+        dlg.setAttribute(Qt.WA_DeleteOnClose)
+        dlg.open()
+
+    def _ask(self, title, text, buttons, default, on_answer):
+        box = QMessageBox(QMessageBox.Question, title, text, buttons, self)
+        box.setDefaultButton(default)
+        box.finished.connect(lambda r: on_answer(QMessageBox.StandardButton(r)))
+        self._open_window_modal(box)
+
+    def _notify(self, title, text, icon=QMessageBox.Information):
+        self._open_window_modal(QMessageBox(icon, title, text, QMessageBox.Ok, self))
+
+    def _ask_text(self, title, label, text, on_ok):
+        dlg = QInputDialog(self)
+        dlg.setWindowTitle(title)
+        dlg.setLabelText(label)
+        dlg.setTextValue(text)
+        dlg.textValueSelected.connect(on_ok)
+        self._open_window_modal(dlg)
+
     # ---------- round workflow ----------
     def _start_round_dialog(self):
         # elegir categorías con checkboxes
-        dlg = CategoryDialog(self.sections, self)
-        if dlg.exec() != QtWidgets.QDialog.Accepted:
-            return
-        
-        cats = dlg.selected_categories()
+        dlg = CategoryDialog(self.pool.sections, self)
+        dlg.accepted.connect(lambda: self._categories_chosen(dlg.selected_categories()))
+        self._open_window_modal(dlg)
+
+    def _categories_chosen(self, cats):
         if not cats:
-            QMessageBox.warning(self, "Categorías", "Debe seleccionar al menos una categoría o 'TODAS'.")
+            self._notify("Categorías", "Debe seleccionar al menos una categoría o 'TODAS'.", QMessageBox.Warning)
             return
         self.selected_categories = cats
 
         # nombres de equipos
-        a, ok = QInputDialog.getText(self, "Nombre Equipo A", "Ingrese nombre del Equipo A:", text="Equipo A")
-        if not ok or not a.strip():
-            return
-        b, ok2 = QInputDialog.getText(self, "Nombre Equipo B", "Ingrese nombre del Equipo B:", text="Equipo B")
-        if not ok2 or not b.strip():
-            return
+        def team_b(a):
+            if a.strip():
+                self._ask_text("Nombre Equipo B", "Ingrese nombre del Equipo B:", "Equipo B",
+                               lambda b: b.strip() and self._teams_chosen(a, b))
+        self._ask_text("Nombre Equipo A", "Ingrese nombre del Equipo A:", "Equipo A", team_b)
 
+    def _teams_chosen(self, a, b):
         self.teamA_name = a.strip()
         self.teamB_name = b.strip()
         
@@ -618,47 +740,40 @@ class QuizWindow(QMainWindow):
         # Normaliza categorías seleccionadas
         sel = [s.strip().upper() for s in self.selected_categories]
 
-        # 1. Si el usuario selecciona SOLO “TODAS”
-        if sel == ["TODAS"]:
-            pool = list(self.remaining_questions)
+        # 1. Si el usuario selecciona SOLO “TODAS” -> todas las secciones
         # 2. Si el usuario selecciona una o más categorías específicas
-        else:
-            selset = set(sel)
-            pool = [
-                q for q in self.remaining_questions
-                if (q.get("section") or "").strip().upper() in selset
-            ]
-        
-        # 3. Validación estricta de ronda completa
-        if len(pool) < self.per_round:
-            QMessageBox.warning(
-                self, "Preguntas insuficientes",
-                f"Quedan {len(pool)} preguntas en las categorías seleccionadas.\n"
-                f"Se requieren {self.per_round}."
+        sections = None if sel == ["TODAS"] else set(sel)
+        
+        # 3. Validación estricta de ronda completa. El sorteo y el registro de
+        # usadas son un solo paso bajo el lock del pool compartido: otro
+        # escenario no puede llevarse las mismas preguntas en el medio.
+        try:
+            # Selección de preguntas: cuotas por sección, balance de dificultad y peso por antigüedad
+            sample = self.pool.draw_round(self.per_round, sections, arena=self.arena or 1)
+        except ValueError:
+            self._notify(
+                "Preguntas insuficientes",
+                f"Quedan {self.pool.available(sections)} preguntas en las categorías seleccionadas.\n"
+                f"Se requieren {self.per_round}.",
+                QMessageBox.Warning
             )
             return
-
-        # Selección de preguntas
-        sample = random.sample(pool, self.per_round)
-        ids = {q["id"] for q in sample}
-
-        # Limpiar las usadas
-        self.remaining_questions = [
-            q for q in self.remaining_questions
-            if q["id"] not in ids
-        ]
-        self.used_ids.update(ids)
-        self._save_state()
         
         # Cargar ronda
         self.current_round = sample
         self.current_index = -1
+        self.revealed = False
+        self.match_log.record(matchlog.ROUND_START, teamA=self.teamA_name, teamB=self.teamB_name,
+                              ids=[q["id"] for q in sample])
+        self._save_round_snapshot()
+        self.media.prefetch(q.get("image") for q in sample[:self.prefetch_ahead])
         self.lbl_question.setText("Ronda generada.\nPulsa 'Siguiente pregunta'.")
         self.btn_next.setEnabled(True)
         self.btn_stop.setEnabled(False)
         self.btn_correct.setEnabled(False)
         self.btn_wrong.setEnabled(False)
         self._refresh_ui()
+        self._publish("round")
 
     def next_question(self):
         # Si el timer está corriendo, no avanzamos
@@ -667,7 +782,7 @@ class QuizWindow(QMainWindow):
 
         # Si no hay ronda generada
         if not self.current_round:
-            QMessageBox.warning(self, "Sin ronda", "No hay una ronda generada.")
+            self._notify("Sin ronda", "No hay una ronda generada.", QMessageBox.Warning)
             return
 
         # Avanzar índice
@@ -681,8 +796,17 @@ class QuizWindow(QMainWindow):
                 self.timer.stop()
             except Exception:
                 pass
+            self.revealed = False
+            self.lbl_question.setText("Ronda finalizada.\nPresiona 'Iniciar Ronda'.")
+            self.lbl_image.hide()
+            self.current_index = -1
+            self.match_log.record(matchlog.ROUND_END)
+            self.round_snapshot.clear()
+            self.pool.release(self.arena or 1)
+            self.reports.submit(self.match_log.path, self.pool.index, self.pool.bank_names)
+            self._publish("round_end")
 
-            # Mensaje de fin de ronda con puntajes
+            # Mensaje de fin de ronda con puntajes (no bloquea: el show sigue)
             msg = QtWidgets.QMessageBox(self)
             msg.setWindowTitle(" 🎉  Ronda finalizada")
             msg.setText(
@@ -690,14 +814,16 @@ class QuizWindow(QMainWindow):
                 f"Puntajes:\n"
                 f"• {self.teamA_name}: {self.teamA_correct} correctas, {self.teamA_wrong} erradas\n"
                 f"• {self.teamB_name}: {self.teamB_correct} correctas, {self.teamB_wrong} erradas\n\n"
+                f"El informe se está generando en '{self.reports.out_dir}'.\n"
                 "Pulsa 'Iniciar Ronda' para comenzar otra."
             )
             msg.setIcon(QtWidgets.QMessageBox.Information)
             msg.setStandardButtons(QtWidgets.QMessageBox.Ok)
-            msg.exec()
+            msg.setAttribute(Qt.WA_DeleteOnClose)
+            msg.setModal(False)
+            msg.show()
 
             # Limpiamos la UI y bloqueamos controles
-            self.lbl_question.setText("Ronda finalizada.\nPresiona 'Iniciar Ronda'.")
             for b in self.option_buttons:
                 b.setText("")
                 b.setEnabled(False)
@@ -708,28 +834,33 @@ class QuizWindow(QMainWindow):
             self.btn_wrong.setEnabled(False)
             self.btn_stop.setEnabled(False)
             
-            # Reset contador visual y estado del índice
+            # Reset contador visual
             self.lbl_qcounter.setText("0 / 0")
-            self.current_index = -1
             return
             
         # Si hay pregunta disponible, asignamos el índice y la mostramos
         self.current_index = next_idx
         q = self.current_round[self.current_index]
+        self.revealed = False
+        self.match_log.record(matchlog.QUESTION, index=self.current_index, qid=q["id"])
         self._display_question(q)
 
         # Reiniciamos timer y estado
         self.remaining_seconds = self.seconds_per_question
         self.timer_running = True
+        self.tick_at = time.time()
         self.timer.start()
         self.btn_stop.setEnabled(True)
         self.btn_correct.setEnabled(False)
         self.btn_wrong.setEnabled(False)
         self.active_team = None
         self._refresh_ui()
+        self._save_progress()
+        self._publish("question")
 
     def _display_question(self, q):
         self.lbl_question.setText(q.get("question", ""))
+        self._show_image(q)
         
         # set options
         for i, b in enumerate(self.option_buttons):
@@ -746,6 +877,29 @@ class QuizWindow(QMainWindow):
         
         self._refresh_ui()
 
+    def _show_image(self, q):
+        """Imagen desde la caché; si todavía no está, se pide al frente de la cola y se
+        muestra al llegar (nunca se decodifica en el hilo de la GUI)."""
+        path = q.get("image")
+        pix = self.media.get(path) if path else None
+        if pix is None:
+            self.lbl_image.clear()
+            self.lbl_image.hide()
+            self.media.request(path, urgent=True)
+        else:
+            self.lbl_image.setPixmap(pix)
+            self.lbl_image.show()
+        
+        # preparar las imágenes de las próximas preguntas
+        upcoming = self.current_round[self.current_index + 1:self.current_index + 1 + self.prefetch_ahead]
+        self.media.prefetch(x.get("image") for x in upcoming)
+
+    def _on_image_loaded(self, path):
+        if self.current_round and 0 <= self.current_index < len(self.current_round):
+            if self.current_round[self.current_index].get("image") == path:
+                self.lbl_image.setPixmap(self.media.get(path))
+                self.lbl_image.show()
+
     # ---------- timer ----------
     def _tick(self):
         if not self.timer_running:
@@ -756,6 +910,7 @@ class QuizWindow(QMainWindow):
             self.timer.stop()
             self.time_bar.setValue(0)
             self.lbl_time_num.setText("0")
+            self.match_log.record(matchlog.TIMEOUT)
             
             # NUEVO: Reproducir sonido de tiempo agotado
             if self.timeout_sound.isLoaded():
@@ -770,8 +925,11 @@ class QuizWindow(QMainWindow):
             
         # decrement and update bar + numeric label
         self.remaining_seconds -= 1
+        self.tick_at = time.time()
         self.time_bar.setValue(self.remaining_seconds)
         self.lbl_time_num.setText(str(self.remaining_seconds))
+        self._save_progress()
+        self._publish("tick")
 
     def manual_stop_timer(self):
         if not self.timer_running:
@@ -791,24 +949,29 @@ class QuizWindow(QMainWindow):
             return
             
         q = self.current_round[self.current_index]
-        correct = (q.get("correct") or "").strip().lower()
-        
-        for i, b in enumerate(self.option_buttons):
-            opt = (q.get("options") or [])[i] if i < len(q.get("options", [])) else ""
-            
-            if opt and correct and opt.strip().lower() == correct:
-                b.setStyleSheet("background: #1FB954; color: white; border-radius: 8px;") # verde correcto
-            else:
-                b.setStyleSheet("background: #2B2B2B; color: #cfcfcf; border-radius: 8px;")
+        self._show_answer(q)
 
         self.btn_correct.setEnabled(True)
         self.btn_wrong.setEnabled(True)
         self.btn_next.setEnabled(True)
         self.btn_stop.setEnabled(False)
+        self.revealed = True
+        self.match_log.record(matchlog.REVEAL)
+        self._save_progress()
+        self._publish("reveal")
+
+    def _show_answer(self, q):
+        correct_idx = self._correct_index(q)
+        for i, b in enumerate(self.option_buttons):
+            if i == correct_idx:
+                b.setStyleSheet("background: #1FB954; color: white; border-radius: 8px;") # verde correcto
+            else:
+                b.setStyleSheet("background: #2B2B2B; color: #cfcfcf; border-radius: 8px;")
 
     # ---------- buzzer/team logic ----------
     def _set_active_team(self, team):
         self.active_team = team
+        self.match_log.record(matchlog.BUZZ, team=team)
         if self.timer_running:
             self.timer_running = False
             self.timer.stop()
@@ -825,28 +988,32 @@ class QuizWindow(QMainWindow):
         self.btn_correct.setEnabled(True)
         self.btn_wrong.setEnabled(True)
         self.btn_next.setEnabled(True)
+        self._save_progress()
+        self._publish("buzz")
 
     def _mark_correct(self):
         if not self.active_team:
-            QMessageBox.warning(self, "Sin equipo", "Presiona el buzzer del equipo antes de marcar.")
+            self._notify("Sin equipo", "Presiona el buzzer del equipo antes de marcar.", QMessageBox.Warning)
             return
 
         if self.active_team == "A":
             self.teamA_correct += 1
         else:
             self.teamB_correct += 1
+        self.match_log.record(matchlog.MARK, team=self.active_team, correct=True)
             
         self._after_marking()
 
     def _mark_wrong(self):
         if not self.active_team:
-            QMessageBox.warning(self, "Sin equipo", "Presiona el buzzer del equipo antes de marcar.")
+            self._notify("Sin equipo", "Presiona el buzzer del equipo antes de marcar.", QMessageBox.Warning)
             return
 
         if self.active_team == "A":
             self.teamA_wrong += 1
         else:
             self.teamB_wrong += 1
+        self.match_log.record(matchlog.MARK, team=self.active_team, correct=False)
             
         self._after_marking()
 
@@ -860,70 +1027,154 @@ class QuizWindow(QMainWindow):
         self.btn_correct.setEnabled(False)
         self.btn_wrong.setEnabled(False)
         self._refresh_ui()
+        self._save_progress()
+        self._publish("mark")
 
     # ---------- CSV load ----------
     def _cmd_load_csv(self):
-        fp, _ = QFileDialog.getOpenFileName(self, "Selecciona questions.csv", filter="CSV files (*.csv);;All files (*)")
-        if not fp:
-            return
+        dlg = QFileDialog(self, "Selecciona uno o más bancos CSV", "", "CSV files (*.csv);;All files (*)")
+        dlg.setFileMode(QFileDialog.ExistingFiles)
+        dlg.filesSelected.connect(self._csv_files_chosen)
+        self._open_window_modal(dlg)
 
-        # preguntar si reiniciar historial de usadas
-        resp = QMessageBox.question(self, "Reiniciar historial", "¿Deseas reiniciar el historial de preguntas usadas al cargar este CSV?\n(Si NO, se preservarán las usadas)", QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
-        if resp == QMessageBox.Cancel:
+    def _csv_files_chosen(self, fps):
+        if not fps:
             return
 
-        self.csv_file = Path(fp)
-        self._load_questions()
-
-        if resp == QMessageBox.Yes:
-            # vaciar used_ids y eliminar state.json si existe
-            self.used_ids = set()
+        # preguntar si reiniciar historial de usadas
+        def answer(resp):
+            if resp not in (QMessageBox.Yes, QMessageBox.No):
+                return
+            # el banco es compartido: lo ven todos los escenarios desde su próxima ronda
             try:
-                if self.state_file.exists():
-                    self.state_file.unlink()
-            except Exception as e:
-                print("No se pudo borrar state.json:", e)
-
-        # guardar estado actual (por si cambiamos used)
-        self._save_state()
-        QMessageBox.information(self, "CSV", "CSV cargado correctamente.")
-        self._refresh_ui()
+                self.pool.load([Path(fp) for fp in fps], reset_used=resp == QMessageBox.Yes)
+            except ValueError as e:
+                self._notify("CSV", f"No se cargó el banco: {e}", QMessageBox.Warning)
+                return
+            self._notify("CSV", "CSV cargado correctamente.")
+            self._refresh_ui()
+        self._ask("Reiniciar historial", "¿Deseas reiniciar el historial de preguntas usadas al cargar este CSV?\n(Si NO, se preservarán las usadas)",
+                  QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.Cancel, answer)
 
     def _cmd_reset_progress(self):
         # 1. Diálogo de confirmación
-        reply = QMessageBox.question(self, 'Resetear Progreso', 
-                                    "¿Estás seguro de que quieres **resetear el progreso**?\nEsto borrará el archivo quiz_state.json y todas las preguntas estarán disponibles de nuevo.", 
-                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        self._ask('Resetear Progreso',
+                  "¿Estás seguro de que quieres **resetear el progreso**?\nEsto borrará el archivo quiz_state.json y todas las preguntas estarán disponibles de nuevo.",
+                  QMessageBox.Yes | QMessageBox.No, QMessageBox.No, self._reset_progress_answer)
 
+    def _reset_progress_answer(self, reply):
         if reply == QMessageBox.Yes:
             try:
-                # 2. Borrar el archivo de estado
-                if self.state_file.exists():
-                    os.remove(self.state_file)
-                
-                # 3. Resetear el estado interno y recargar preguntas
-                self.used_ids = set()
-                self._load_questions() # Vuelve a cargar todas las preguntas del CSV
+                # 2. Borrar el archivo de estado y liberar todas las preguntas
+                # (las de rondas en curso en otros escenarios siguen reservadas)
+                self.pool.release(self.arena or 1)
+                self.pool.reset()
                 
                 # 4. Actualizar la UI
-                QMessageBox.information(self, "Progreso Reseteado", "El progreso ha sido reseteado.\nTodas las preguntas están disponibles para la siguiente ronda.")
+                self._notify("Progreso Reseteado", "El progreso ha sido reseteado.\nTodas las preguntas están disponibles para la siguiente ronda.")
                 self.lbl_question.setText("Progreso reseteado. Pulsa 'Iniciar Ronda'.")
+                self.lbl_image.hide()
                 self.current_round = []
                 self.current_index = -1
+                self.round_snapshot.clear()
                 self._refresh_ui()
+                self._publish("reset")
                 
             except Exception as e:
-                QMessageBox.critical(self, "Error", f"No se pudo borrar el archivo de estado: {e}")
+                self._notify("Error", f"No se pudo borrar el archivo de estado: {e}", QMessageBox.Critical)
+
+    def closeEvent(self, event):
+        self.match_log.close()
+        self.round_snapshot.writer.flush()
+        self.reports.flush()
+        super().closeEvent(event)
 
 # ---------- run ----------
 if __name__ == "__main__":
-    import argparse
+    import argparse, multiprocessing
+    multiprocessing.freeze_support() # el ejecutable de PyInstaller lee los bancos en procesos
     parser = argparse.ArgumentParser()
-    parser.add_argument("--file", default="questions.csv")
+    parser.add_argument("--file", nargs="+", default=["questions.csv"], help="bancos: archivos CSV o carpetas con CSV")
     parser.add_argument("--card_bg", default="imgs/olimpiada.png")
+    parser.add_argument("--arenas", type=int, default=1, help="escenarios simultáneos que comparten banco")
+    parser.add_argument("--watchdog-ms", type=int, default=250, help="umbral de bloqueo del event loop (0 = desactivado)")
+    parser.add_argument("--displays", type=int, default=0, help="pantallas del público en procesos aparte")
+    parser.add_argument("--scoreboard-port", type=int, default=0, help="puerto del marcador web (0 = desactivado)")
+    parser.add_argument("--broadcast", help="destino de la señal de programa: archivo .rgba o '|comando encoder'")
+    parser.add_argument("--broadcast-size", default="1920x1080")
+    parser.add_argument("--broadcast-fps", type=int, default=30, choices=(30, 60))
+    # argumentos internos de un proceso de pantalla del público
+    parser.add_argument("--display", help=argparse.SUPPRESS)
+    parser.add_argument("--notify-port", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--screen", type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument("--broadcast-render", help=argparse.SUPPRESS)
     args = parser.parse_args()
+    if args.broadcast and not args.display:
+        # solo el proceso principal y el de render del broadcast usan el tamaño
+        try:
+            bw, bh = (int(x) for x in args.broadcast_size.lower().split("x"))
+            if bw <= 0 or bh <= 0:
+                raise ValueError
+        except ValueError:
+            parser.error(f"--broadcast-size inválido: '{args.broadcast_size}' (ej. 1920x1080)")
+    
+    if args.display:
+        sys.exit(run_display(args.display, args.notify_port, args.screen, args.card_bg))
+    if args.broadcast_render:
+        sys.exit(run_broadcast(args.broadcast_render, args.broadcast, bw, bh, args.broadcast_fps, args.card_bg))
     
     app = QApplication(sys.argv)
-    win = QuizWindow(csv_file=args.file, card_bg=args.card_bg)
-    win.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    if args.watchdog_ms > 0:
+        watchdog = StallWatchdog(threshold_ms=args.watchdog_ms, parent=app)
+        watchdog.start()
+    
+    # un solo banco en memoria para todos los escenarios
+    paths = []
+    for qpath in (Path(p) for p in args.file):
+        if not qpath.exists():
+            alt = Path(resource_path(str(qpath)))
+            if alt.exists():
+                qpath = alt
+        paths.append(qpath)
+    try:
+        pool = QuestionPool(paths)
+    except ValueError as e:
+        parser.error(str(e))
+    media = MediaCache(parent=app) # una caché de imágenes compartida por todos los escenarios
+    arenas = [QuizWindow(pool, card_bg=args.card_bg, arena=i + 1 if args.arenas > 1 else None, media=media)
+              for i in range(max(1, args.arenas))]
+    # pantallas, marcador y broadcast siguen al primer escenario
+    win = arenas[0]
+    
+    audience = None
+    if args.displays > 0:
+        audience = AudienceLink(args.displays, card_bg=resource_path(args.card_bg))
+        win.state_listeners.append(audience)
+    
+    scoreboard = None
+    if args.scoreboard_port > 0:
+        scoreboard = ScoreboardServer(port=args.scoreboard_port).start()
+        if scoreboard:
+            win.state_listeners.append(scoreboard)
+            print(f"Marcador en http://<ip-local>:{scoreboard.port}/")
+        else:
+            QMessageBox.warning(win, "Marcador",
+                                f"No se pudo abrir el marcador web en el puerto {args.scoreboard_port} "
+                                "(¿está en uso?).\nLa partida sigue sin marcador web.")
+    
+    broadcast = None
+    if args.broadcast:
+        broadcast = BroadcastLink(args.broadcast, bw, bh, args.broadcast_fps, card_bg=resource_path(args.card_bg))
+        win.state_listeners.append(broadcast)
+    
+    win._publish("init")
+    for w in arenas:
+        w.show()
+    code = app.exec()
+    if audience:
+        audience.close()
+    if scoreboard:
+        scoreboard.stop()
+    if broadcast:
+        broadcast.close()
+    sys.exit(code)
\ No newline at end of file
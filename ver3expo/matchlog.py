@@ -0,0 +1,303 @@
+# coding: utf-8
+"""
+Registro binario de partidas (solo anexar) con reproducción y búsqueda.
+
+Cada registro: cabecera <BdH> (tipo, timestamp epoch, largo del payload) + payload.
+Los payloads son binarios compactos (strings con prefijo de largo); cada
+SNAPSHOT_EVERY eventos se escribe un SNAPSHOT con el estado completo, así la
+reproducción salta al snapshot anterior al punto pedido y aplica solo los
+eventos que faltan.
+
+  python matchlog.py partidas.qlog --summary
+  python matchlog.py partidas.qlog --at 2026-10-19T15:30:00
+  python matchlog.py partidas.qlog --event 12345
+"""
+import bisect, json, mmap, os, struct, time
+from datetime import datetime
+
+MAGIC = b"QLOG1\n"
+HEADER = struct.Struct("<BdH")
+SNAPSHOT_EVERY = 256
+
+ROUND_START, QUESTION, BUZZ, REVEAL, MARK, TIMEOUT, ROUND_END, SNAPSHOT, RESUME = range(1, 10)
+EVENT_NAMES = {
+    ROUND_START: "round_start", QUESTION: "question", BUZZ: "buzz", REVEAL: "reveal",
+    MARK: "mark", TIMEOUT: "timeout", ROUND_END: "round_end", SNAPSHOT: "snapshot",
+    RESUME: "resume",
+}
+# estos salen al disco de inmediato: sin ellos los eventos siguientes quedan huérfanos
+FLUSH_KINDS = (ROUND_START, RESUME, QUESTION, MARK, ROUND_END)
+
+# ---------- codificación ----------
+def _pack_str(s):
+    b = s.encode("utf-8")
+    return struct.pack("<H", len(b)) + b
+
+def _unpack_str(buf, pos):
+    (n,) = struct.unpack_from("<H", buf, pos)
+    pos += 2
+    return bytes(buf[pos:pos + n]).decode("utf-8"), pos + n
+
+def encode(kind, **data):
+    if kind in (ROUND_START, RESUME):
+        ids = data["ids"]
+        out = (_pack_str(data["teamA"]) + _pack_str(data["teamB"]) + struct.pack("<H", len(ids))
+               + b"".join(_pack_str(i) for i in ids))
+        if kind == RESUME:
+            # ronda retomada tras un cierre: marcador restaurado [Ac, Ae, Bc, Be] e índice actual
+            out += struct.pack("<4Hh", *data["scores"], data["index"])
+        return out
+    if kind == QUESTION:
+        return struct.pack("<H", data["index"]) + _pack_str(data["qid"])
+    if kind == BUZZ:
+        return data["team"].encode("ascii")
+    if kind == MARK:
+        return data["team"].encode("ascii") + struct.pack("<B", 1 if data["correct"] else 0)
+    if kind == SNAPSHOT:
+        return json.dumps(data["state"], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"" # REVEAL, TIMEOUT, ROUND_END
+
+def decode(kind, payload):
+    if kind in (ROUND_START, RESUME):
+        teamA, pos = _unpack_str(payload, 0)
+        teamB, pos = _unpack_str(payload, pos)
+        (n,) = struct.unpack_from("<H", payload, pos)
+        pos += 2
+        ids = []
+        for _ in range(n):
+            qid, pos = _unpack_str(payload, pos)
+            ids.append(qid)
+        out = {"teamA": teamA, "teamB": teamB, "ids": ids}
+        if kind == RESUME:
+            *scores, index = struct.unpack_from("<4Hh", payload, pos)
+            out.update(scores=list(scores), index=index)
+        return out
+    if kind == QUESTION:
+        (index,) = struct.unpack_from("<H", payload, 0)
+        qid, _ = _unpack_str(payload, 2)
+        return {"index": index, "qid": qid}
+    if kind == BUZZ:
+        return {"team": bytes(payload[:1]).decode("ascii")}
+    if kind == MARK:
+        return {"team": bytes(payload[:1]).decode("ascii"), "correct": bool(payload[1])}
+    if kind == SNAPSHOT:
+        return {"state": json.loads(bytes(payload).decode("utf-8"))}
+    return {}
+
+# ---------- estado reconstruido ----------
+class MatchState:
+    """Estado de la partida que se obtiene aplicando los eventos en orden."""
+    def __init__(self):
+        self.events = 0 # eventos aplicados (sin contar snapshots)
+        self.ts = 0.0
+        self.round_no = 0
+        self.teams = {"A": "Equipo A", "B": "Equipo B"}
+        self.scores = {"A": [0, 0], "B": [0, 0]} # [correctas, erradas]
+        self.round_ids = []
+        self.index = -1
+        self.qid = None
+        self.shown_at = None
+        self.active_team = None
+        self.buzz_time = None
+        self.revealed = False
+        self.timed_out = False
+        self.in_round = False
+        self.outcomes = [] # resultados de la ronda actual
+
+    def apply(self, kind, ts, data):
+        self.events += 1
+        self.ts = ts
+        if kind == ROUND_START:
+            self.round_no += 1
+            self.teams = {"A": data["teamA"], "B": data["teamB"]}
+            self.scores = {"A": [0, 0], "B": [0, 0]}
+            self.round_ids = list(data["ids"])
+            self.index, self.qid = -1, None
+            self.outcomes = []
+            self.in_round = True
+        elif kind == RESUME:
+            # la misma ronda si el log ya la tenía abierta; si no (el inicio no llegó
+            # al disco), una ronda nueva que arranca con el marcador restaurado
+            if not (self.in_round and self.round_ids == list(data["ids"])):
+                self.round_no += 1
+                self.round_ids = list(data["ids"])
+                self.outcomes = []
+            self.teams = {"A": data["teamA"], "B": data["teamB"]}
+            sc = data["scores"]
+            self.scores = {"A": [sc[0], sc[1]], "B": [sc[2], sc[3]]}
+            self.index, self.qid = data["index"], None
+            self.active_team = self.buzz_time = None
+            self.in_round = True
+        elif kind == QUESTION:
+            self.index, self.qid = data["index"], data["qid"]
+            self.shown_at = ts
+            self.active_team = self.buzz_time = None
+            self.revealed = self.timed_out = False
+        elif kind == BUZZ:
+            self.active_team = data["team"]
+            self.buzz_time = ts - self.shown_at if self.shown_at else None
+        elif kind == REVEAL:
+            self.revealed = True
+        elif kind == TIMEOUT:
+            self.timed_out = True
+        elif kind == MARK:
+            team = data["team"]
+            self.scores[team][0 if data["correct"] else 1] += 1
+            self.outcomes.append({
+                "qid": self.qid, "team": team, "correct": data["correct"],
+                "buzz_time": self.buzz_time, "timed_out": self.timed_out,
+            })
+            self.active_team = None
+        elif kind == ROUND_END:
+            self.in_round = False
+            self.index, self.qid = -1, None
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, d):
+        st = cls()
+        st.__dict__.update(d)
+        return st
+
+# ---------- escritura ----------
+class MatchLog:
+    """Escribe eventos con anexado bufferizado; cada tanto, un snapshot."""
+    def __init__(self, path="partidas.qlog", snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.state = MatchState()
+        self.f = None
+        try:
+            new = not os.path.exists(path) or os.path.getsize(path) == 0
+            if not new:
+                # continuar un log existente: partir del último estado
+                reader = MatchLogReader(path)
+                self.state = reader.state_at_event(None)
+                end = reader.end
+                reader.close()
+                if end < os.path.getsize(path):
+                    # descartar el registro cortado de un cierre abrupto
+                    with open(path, "r+b") as f:
+                        f.truncate(end)
+            self.f = open(path, "ab", buffering=64 * 1024)
+            if new:
+                self.f.write(MAGIC)
+        except Exception as e:
+            print("Error opening match log:", e)
+
+    def record(self, kind, **data):
+        if self.f is None:
+            return
+        ts = time.time()
+        try:
+            self._write(kind, ts, encode(kind, **data))
+            self.state.apply(kind, ts, data)
+            if self.state.events % self.snapshot_every == 0:
+                self._write(SNAPSHOT, ts, encode(SNAPSHOT, state=self.state.to_dict()))
+            # inicio de ronda, preguntas, marcas y fin de ronda salen al disco de inmediato
+            if kind in FLUSH_KINDS:
+                self.f.flush()
+        except Exception as e:
+            print("Error writing match log:", e)
+
+    def _write(self, kind, ts, payload):
+        self.f.write(HEADER.pack(kind, ts, len(payload)))
+        self.f.write(payload)
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+# ---------- lectura / reproducción ----------
+class MatchLogReader:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+        if self.buf[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: no es un log de partidas")
+        self._index()
+
+    def close(self):
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+
+    def _index(self):
+        """Recorre solo las cabeceras: posición y tiempo de cada snapshot."""
+        self.snap_events, self.snap_ts, self.snap_pos = [], [], []
+        self.end = len(self.buf)
+        pos, events = len(MAGIC), 0
+        size = len(self.buf)
+        while pos + HEADER.size <= size:
+            kind, ts, n = HEADER.unpack_from(self.buf, pos)
+            if pos + HEADER.size + n > size:
+                break # registro cortado (cierre abrupto): se ignora
+            if kind == SNAPSHOT:
+                self.snap_events.append(events)
+                self.snap_ts.append(ts)
+                self.snap_pos.append(pos)
+            else:
+                events += 1
+            pos += HEADER.size + n
+        self.end = pos
+        self.total_events = events
+
+    def records(self, start=None):
+        pos = start if start is not None else len(MAGIC)
+        while pos < self.end:
+            kind, ts, n = HEADER.unpack_from(self.buf, pos)
+            body = pos + HEADER.size
+            yield pos, kind, ts, self.buf[body:body + n]
+            pos = body + n
+
+    def _replay(self, snap_i, stop):
+        if snap_i >= 0:
+            pos = self.snap_pos[snap_i]
+            _, _, n = HEADER.unpack_from(self.buf, pos)
+            state = MatchState.from_dict(decode(SNAPSHOT, self.buf[pos + HEADER.size:pos + HEADER.size + n])["state"])
+            start = pos + HEADER.size + n
+        else:
+            state, start = MatchState(), None
+        for _, kind, ts, payload in self.records(start):
+            if kind == SNAPSHOT:
+                continue
+            if stop(state, ts):
+                break
+            state.apply(kind, ts, decode(kind, payload))
+        return state
+
+    def state_at_event(self, n):
+        """Estado tras aplicar los primeros n eventos (None = todos)."""
+        if n is None:
+            n = self.total_events
+        i = bisect.bisect_right(self.snap_events, n) - 1
+        return self._replay(i, lambda st, ts: st.events >= n)
+
+    def state_at_time(self, t):
+        """Estado con todos los eventos de timestamp <= t."""
+        i = bisect.bisect_right(self.snap_ts, t) - 1
+        return self._replay(i, lambda st, ts: ts > t)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Reproduce un log de partidas")
+    parser.add_argument("log")
+    parser.add_argument("--at", help="fecha/hora ISO (ej. 2026-10-19T15:30:00)")
+    parser.add_argument("--event", type=int, help="número de evento")
+    parser.add_argument("--summary", action="store_true")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    reader = MatchLogReader(args.log)
+    if args.summary:
+        print(f"{reader.total_events} eventos, {len(reader.snap_pos)} snapshots")
+    if args.at:
+        state = reader.state_at_time(datetime.fromisoformat(args.at).timestamp())
+    else:
+        state = reader.state_at_event(args.event)
+    print(json.dumps(state.to_dict(), ensure_ascii=False, indent=2))
+    print(f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
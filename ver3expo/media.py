@@ -0,0 +1,99 @@
+# coding: utf-8
+"""
+Imágenes de las preguntas: decodificación en segundo plano + caché LRU.
+
+- Un hilo decodifica y escala (QImageReader con setScaledSize: un JPEG grande
+  se decodifica directo al tamaño de la tarjeta) y entrega un QImage.
+- En el hilo de la GUI el QImage pasa a QPixmap y entra a una caché LRU
+  acotada por bytes; lo más viejo sale cuando se pasa del tope.
+- La ventana pide por adelantado las imágenes de las próximas preguntas de la
+  ronda; la de la pregunta actual pasa al frente de la cola.
+"""
+import collections, threading
+from pathlib import Path
+from PySide6.QtCore import QObject, QSize, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+
+class MediaCache(QObject):
+    loaded = Signal(str) # ruta lista en la caché (se emite en el hilo de la GUI)
+    _decoded = Signal(str, QImage) # del hilo decodificador a la GUI
+
+    def __init__(self, width=760, height=260, max_bytes=64 * 1024 * 1024, parent=None):
+        super().__init__(parent)
+        self.box = QSize(width, height)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._cache = collections.OrderedDict() # ruta -> QPixmap (lo más reciente al final)
+        self._failed = set()
+        self._pending = collections.deque()
+        self._queued = set() # encoladas o decodificándose
+        self._cond = threading.Condition()
+        self._decoded.connect(self._store) # conexión en cola: _store corre en la GUI
+        self._thread = threading.Thread(target=self._run, name="media-decoder", daemon=True)
+        self._thread.start()
+
+    # ---------- GUI ----------
+    def get(self, path):
+        """QPixmap si ya está en caché (y lo marca como reciente); si no, None."""
+        pix = self._cache.get(path)
+        if pix is not None:
+            self._cache.move_to_end(path)
+        return pix
+
+    def request(self, path, urgent=False):
+        if not path or path in self._cache or path in self._failed:
+            return
+        with self._cond:
+            if path in self._queued:
+                if urgent and path in self._pending:
+                    self._pending.remove(path)
+                    self._pending.appendleft(path)
+                return
+            self._queued.add(path)
+            (self._pending.appendleft if urgent else self._pending.append)(path)
+            self._cond.notify()
+
+    def prefetch(self, paths):
+        for p in paths:
+            self.request(p)
+
+    def _store(self, path, image):
+        with self._cond:
+            self._queued.discard(path)
+        if image.isNull():
+            self._failed.add(path)
+            return
+        pix = QPixmap.fromImage(image)
+        size = pix.width() * pix.height() * 4
+        self._cache[path] = pix
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self.bytes -= old.width() * old.height() * 4
+        self.loaded.emit(path)
+
+    # ---------- hilo decodificador ----------
+    def _decode(self, path):
+        reader = QImageReader(path)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if size.isValid() and (size.width() > self.box.width() or size.height() > self.box.height()):
+            reader.setScaledSize(size.scaled(self.box, Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            print(f"Advertencia: no se pudo cargar la imagen {path}: {reader.errorString()}")
+            return image
+        if image.width() > self.box.width() or image.height() > self.box.height():
+            image = image.scaled(self.box, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        return image
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                path = self._pending.popleft()
+            image = self._decode(path) if Path(path).exists() else QImage()
+            if image.isNull() and not Path(path).exists():
+                print(f"Advertencia: imagen no encontrada: {path}")
+            self._decoded.emit(path, image)
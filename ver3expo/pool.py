@@ -0,0 +1,127 @@
+# coding: utf-8
+"""
+Banco compartido entre escenarios (arenas) de un mismo proceso.
+
+- Las preguntas se cargan una sola vez y todos los escenarios leen las mismas
+  listas/dicts (solo lectura): agregar escenarios no duplica el banco.
+- Un único registro de usadas (state.json) y un único sorteador: sortear una
+  ronda y marcarla como usada ocurre bajo el mismo lock, así dos escenarios
+  nunca pueden sacar la misma pregunta. El lock solo cubre O(per_round).
+- Las preguntas de una ronda en curso quedan reservadas para su escenario
+  (hold/release): resetear el progreso o recargar el banco desde otro
+  escenario no las devuelve al sorteo.
+"""
+import json, threading, time
+from pathlib import Path
+from bank import load_banks, namespace_id
+from sampler import RoundSampler
+from resume import atomic_write_text
+
+def arena_file(path, arena):
+    """Archivo propio de un escenario: partidas.qlog -> partidas-2.qlog (el primero sin sufijo)."""
+    path = Path(path)
+    if not arena or arena == 1:
+        return path
+    return path.with_name(f"{path.stem}-{arena}{path.suffix}")
+
+class QuestionPool:
+    def __init__(self, paths, state_file="state.json"):
+        self.state_file = Path(state_file)
+        self.lock = threading.Lock()
+        self.paths = []
+        self.questions = []
+        self.index = {} # id (banco:id) -> pregunta
+        self.bank_names = []
+        self.sections = []
+        self.used = set() # ids ya usadas en cualquier escenario (persistidas)
+        self.shown = {} # id -> timestamp de la última vez que salió (persistido)
+        self.held = {} # escenario -> ids de su ronda en curso
+        self.sampler = None
+        self.load(paths)
+
+    # ---------- persistencia ----------
+    def _read_state(self):
+        used, shown = set(), {}
+        try:
+            if self.state_file.exists():
+                data = json.loads(self.state_file.read_text(encoding="utf-8"))
+                if isinstance(data.get("used"), list):
+                    used = set(str(x) for x in data["used"])
+                if isinstance(data.get("shown"), dict):
+                    shown = {str(k): float(v) for k, v in data["shown"].items()}
+        except Exception as e:
+            print("Error reading state.json:", e)
+        return used, shown
+
+    def _save(self):
+        try:
+            data = {"used": sorted(self.used), "shown": self.shown}
+            atomic_write_text(self.state_file, json.dumps(data, ensure_ascii=False, indent=2))
+        except Exception as e:
+            print("Error writing state.json:", e)
+
+    def _reserved(self):
+        return set().union(*self.held.values())
+
+    def _rebuild(self):
+        self.sampler = RoundSampler([q for q in self.questions if q["id"] not in self.used], self.shown)
+
+    # ---------- banco ----------
+    def load(self, paths, reset_used=False):
+        """(Re)carga los bancos. Con reset_used se vacía el historial de usadas."""
+        questions, index, names = load_banks(paths)
+        used, shown = (set(), {}) if reset_used else self._read_state()
+        with self.lock:
+            self.paths = list(paths)
+            self.questions, self.index, self.bank_names = questions, index, names
+            # ids de versiones anteriores (sin banco) corresponden al primer banco
+            self.used = {namespace_id(x, names) for x in used} | self._reserved()
+            self.shown = {namespace_id(k, names): v for k, v in shown.items()}
+            self.sections = sorted({(q.get("section") or "").strip() for q in questions if (q.get("section") or "").strip()})
+            self._rebuild()
+            if reset_used:
+                self._save()
+
+    def reset(self):
+        """Todas las preguntas vuelven a estar disponibles, salvo las de rondas en curso."""
+        with self.lock:
+            self.used = self._reserved()
+            if self.used:
+                self._save()
+            elif self.state_file.exists():
+                self.state_file.unlink()
+            self._rebuild()
+
+    def hold(self, arena, ids):
+        """Reserva las preguntas de la ronda en curso del escenario (p. ej. al reanudarla)."""
+        with self.lock:
+            ids = set(ids)
+            self.held[arena] = ids
+            if not ids <= self.used:
+                self.used |= ids
+                self.sampler.mark_used(ids)
+                self._save()
+
+    def release(self, arena):
+        """La ronda del escenario terminó: sus preguntas siguen usadas pero ya no reservadas."""
+        with self.lock:
+            self.held.pop(arena, None)
+
+    def available(self, sections=None):
+        """Preguntas sin usar en las secciones dadas (todas si None)."""
+        with self.lock:
+            return sum(self.sampler.available(sections).values())
+
+    def draw_round(self, n, sections=None, arena=None):
+        """Sortea n preguntas, las registra como usadas y (con `arena`) las reserva para
+        ese escenario, todo en un solo paso. ValueError si no alcanzan."""
+        with self.lock:
+            sample = self.sampler.draw_round(n, sections)
+            now = time.time()
+            for q in sample:
+                self.used.add(q["id"])
+                self.shown[q["id"]] = now
+            if arena is not None:
+                self.held[arena] = {q["id"] for q in sample}
+            self._save()
+        return sample
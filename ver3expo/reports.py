@@ -0,0 +1,235 @@
+# coding: utf-8
+"""
+Informes de fin de ronda y de torneo (CSV + HTML autocontenido).
+
+Se arman desde el log de partidas (matchlog), no desde la ventana: por
+pregunta, quién contestó, si fue correcta, el tiempo de buzzer y si se agotó
+el tiempo; por equipo, los totales. Al terminar una ronda la ventana encola el
+trabajo en ReportWorker y sigue; el hilo lee el log y escribe:
+
+  reports/ronda-007-20261019-1530.csv / .html   la ronda que terminó
+  reports/torneo.csv / torneo-equipos.csv / torneo.html   todas las rondas del log
+
+  python reports.py partidas.qlog --bank questions.csv --out reports
+"""
+import csv, html, os, queue, threading, time
+from pathlib import Path
+import matchlog
+from bank import namespace_id
+
+# ---------- lectura del log ----------
+def read_rounds(path, banks=(), complete_only=True):
+    """Rondas del log con una fila por pregunta mostrada (y sus marcas).
+    `banks`: nombres de banco; los ids viejos sin banco son del primero."""
+    rounds, rnd, q = [], None, None
+    reader = matchlog.MatchLogReader(path)
+    try:
+        for _, kind, ts, payload in reader.records():
+            if kind == matchlog.SNAPSHOT:
+                continue
+            data = matchlog.decode(kind, payload)
+            if kind == matchlog.ROUND_START or (kind == matchlog.RESUME and (rnd is None or rnd["ids"] != data["ids"])):
+                rnd = {"no": len(rounds) + 1, "start": ts, "end": None, "ids": data["ids"],
+                       "teams": {"A": data["teamA"], "B": data["teamB"]}, "questions": [],
+                       "carried": {"A": [0, 0], "B": [0, 0]}}
+                if kind == matchlog.RESUME:
+                    # el inicio de la ronda no quedó en el log: el marcador restaurado
+                    # cubre las marcas anteriores al cierre
+                    sc = data["scores"]
+                    rnd["carried"] = {"A": sc[0:2], "B": sc[2:4]}
+                rounds.append(rnd)
+                q = None
+            elif rnd is None:
+                continue
+            elif kind == matchlog.RESUME:
+                q = None
+            elif kind == matchlog.QUESTION:
+                qid = namespace_id(data["qid"], banks)
+                last = rnd["questions"][-1] if rnd["questions"] else None
+                if last and last["index"] == data["index"] + 1 and last["qid"] == qid:
+                    # la misma pregunta, mostrada de nuevo al retomar la ronda
+                    q = last
+                    q["shown_at"], q["buzz"] = ts, None
+                    continue
+                q = {"index": data["index"] + 1, "qid": qid, "shown_at": ts,
+                     "buzz": None, "marks": [], "timed_out": False}
+                rnd["questions"].append(q)
+            elif kind == matchlog.BUZZ and q is not None:
+                q["buzz"] = (data["team"], ts - q["shown_at"])
+            elif kind == matchlog.TIMEOUT and q is not None:
+                q["timed_out"] = True
+            elif kind == matchlog.MARK and q is not None:
+                buzz = q["buzz"]
+                q["marks"].append({"team": data["team"], "correct": data["correct"],
+                                   "buzz_time": buzz[1] if buzz and buzz[0] == data["team"] else None})
+            elif kind == matchlog.ROUND_END:
+                rnd["end"] = ts
+                rnd, q = None, None
+    finally:
+        reader.close()
+    if complete_only:
+        rounds = [r for r in rounds if r["end"] is not None]
+    return rounds
+
+def outcome_rows(rounds, index):
+    """Filas planas (una por marca; las preguntas sin marcar, una fila sin equipo)."""
+    rows = []
+    for rnd in rounds:
+        for q in rnd["questions"]:
+            info = index.get(q["qid"], {})
+            base = {
+                "ronda": rnd["no"], "n": q["index"], "id": q["qid"],
+                "seccion": info.get("section", ""), "pregunta": info.get("question", ""),
+                "respuesta": info.get("correct", ""), "tiempo_agotado": "si" if q["timed_out"] else "no",
+            }
+            for m in q["marks"] or [None]:
+                row = dict(base, equipo="", resultado="sin marcar", tiempo_buzzer="")
+                if m:
+                    row["equipo"] = rnd["teams"][m["team"]]
+                    row["resultado"] = "correcta" if m["correct"] else "errada"
+                    if m["buzz_time"] is not None:
+                        row["tiempo_buzzer"] = f"{m['buzz_time']:.2f}"
+                rows.append(row)
+    return rows
+
+def team_tallies(rounds):
+    """Totales por nombre de equipo: rondas, ganadas, correctas, erradas, buzzer medio."""
+    out = {}
+    for rnd in rounds:
+        per = {t: list(rnd.get("carried", {}).get(t, (0, 0))) for t in "AB"}
+        for q in rnd["questions"]:
+            for m in q["marks"]:
+                per[m["team"]][0 if m["correct"] else 1] += 1
+        for t in "AB":
+            name = rnd["teams"][t]
+            tal = out.setdefault(name, {"equipo": name, "rondas": 0, "ganadas": 0, "correctas": 0,
+                                        "erradas": 0, "_buzz": []})
+            tal["rondas"] += 1
+            tal["correctas"] += per[t][0]
+            tal["erradas"] += per[t][1]
+            other = "B" if t == "A" else "A"
+            if per[t][0] > per[other][0]:
+                tal["ganadas"] += 1
+            tal["_buzz"].extend(m["buzz_time"] for q in rnd["questions"] for m in q["marks"]
+                                if m["team"] == t and m["buzz_time"] is not None)
+    for tal in out.values():
+        b = tal.pop("_buzz")
+        tal["buzzer_medio"] = f"{sum(b) / len(b):.2f}" if b else ""
+    return sorted(out.values(), key=lambda t: (-t["correctas"], t["erradas"], t["equipo"]))
+
+# ---------- escritura ----------
+ROW_FIELDS = ("ronda", "n", "id", "seccion", "pregunta", "respuesta", "equipo", "resultado",
+              "tiempo_buzzer", "tiempo_agotado")
+TEAM_FIELDS = ("equipo", "rondas", "ganadas", "correctas", "erradas", "buzzer_medio")
+
+def _write_csv(path, fields, rows):
+    tmp = Path(str(path) + ".tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        w.writerows(rows)
+    os.replace(tmp, path)
+
+def _table(fields, rows, cls=None):
+    head = "".join(f"<th>{html.escape(f)}</th>" for f in fields)
+    body = []
+    for r in rows:
+        css = f' class="{cls(r)}"' if cls else ""
+        body.append(f"<tr{css}>" + "".join(f"<td>{html.escape(str(r.get(f, '')))}</td>" for f in fields) + "</tr>")
+    return f"<table><tr>{head}</tr>{''.join(body)}</table>"
+
+def _write_html(path, title, subtitle, teams, rows):
+    doc = f"""<!doctype html>
+<html lang="es"><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>
+body {{ background: #0b0b0b; color: #eee; font-family: Helvetica, Arial, sans-serif; margin: 24px; }}
+h1 {{ color: #ff8a65; }} h2 {{ color: #ccc; margin-top: 28px; }}
+table {{ border-collapse: collapse; width: 100%; font-size: 14px; }}
+th, td {{ border: 1px solid #333; padding: 4px 8px; text-align: left; }}
+th {{ background: #1f2833; }}
+tr.correcta td {{ background: #143d22; }} tr.errada td {{ background: #4a1a15; }}
+</style></head><body>
+<h1>{html.escape(title)}</h1><p>{html.escape(subtitle)}</p>
+<h2>Equipos</h2>{_table(TEAM_FIELDS, teams)}
+<h2>Preguntas</h2>{_table(ROW_FIELDS, rows, lambda r: r["resultado"].replace(" ", "-"))}
+</body></html>
+"""
+    tmp = Path(str(path) + ".tmp")
+    tmp.write_text(doc, encoding="utf-8")
+    os.replace(tmp, path)
+
+def write_round_report(rnd, index, out_dir):
+    """CSV + HTML de una ronda; devuelve la ruta base (sin extensión)."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M", time.localtime(rnd["start"]))
+    base = out_dir / f"ronda-{rnd['no']:03d}-{stamp}"
+    rows = outcome_rows([rnd], index)
+    _write_csv(base.with_suffix(".csv"), ROW_FIELDS, rows)
+    title = f"Ronda {rnd['no']}: {rnd['teams']['A']} vs {rnd['teams']['B']}"
+    subtitle = time.strftime("%d/%m/%Y %H:%M", time.localtime(rnd["start"])) + f" - {len(rnd['questions'])} preguntas"
+    _write_html(base.with_suffix(".html"), title, subtitle, team_tallies([rnd]), rows)
+    return base
+
+def write_tournament_report(rounds, index, out_dir):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rows = outcome_rows(rounds, index)
+    teams = team_tallies(rounds)
+    _write_csv(out_dir / "torneo.csv", ROW_FIELDS, rows)
+    _write_csv(out_dir / "torneo-equipos.csv", TEAM_FIELDS, teams)
+    _write_html(out_dir / "torneo.html", "Torneo", f"{len(rounds)} rondas", teams, rows)
+    return out_dir / "torneo"
+
+# ---------- hilo de informes ----------
+class ReportWorker:
+    """Genera informes en un hilo aparte; la GUI solo encola."""
+    def __init__(self, out_dir="reports"):
+        self.out_dir = Path(out_dir)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="report-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, log_path, index, banks=()):
+        """Informe de la última ronda terminada del log + el del torneo completo.
+        `index` (id -> pregunta) se comparte en solo lectura."""
+        self._queue.put((log_path, index, banks))
+
+    def flush(self):
+        """Espera a que terminen los informes pendientes (al cerrar la app)."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            log_path, index, banks = self._queue.get()
+            try:
+                t0 = time.perf_counter()
+                rounds = read_rounds(log_path, banks)
+                if rounds:
+                    base = write_round_report(rounds[-1], index, self.out_dir)
+                    write_tournament_report(rounds, index, self.out_dir)
+                    print(f"Informe generado: {base}.html ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+            except Exception as e:
+                print("Error generating report:", e)
+            finally:
+                self._queue.task_done()
+
+if __name__ == "__main__":
+    import argparse
+    from bank import load_banks
+    parser = argparse.ArgumentParser(description="Informes de rondas y torneo desde un log de partidas")
+    parser.add_argument("log")
+    parser.add_argument("--bank", nargs="+", default=["questions.csv"], help="bancos: archivos CSV o carpetas")
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--rounds", action="store_true", help="además, un informe por cada ronda")
+    args = parser.parse_args()
+
+    try:
+        _, index, names = load_banks(args.bank)
+    except ValueError as e:
+        parser.error(str(e))
+    rounds = read_rounds(args.log, names)
+    if args.rounds:
+        for rnd in rounds:
+            write_round_report(rnd, index, args.out)
+    print(f"{len(rounds)} rondas -> {write_tournament_report(rounds, index, args.out)}.html")
@@ -0,0 +1,107 @@
+# coding: utf-8
+"""
+Instantánea de la ronda en curso para reanudar tras un cierre inesperado.
+
+- round.json: lo que no cambia durante la ronda (preguntas completas,
+  equipos, categorías). Se escribe una vez al generar la ronda.
+- round_state.json: lo que cambia (índice, marcador, equipo activo,
+  segundos restantes...). Es chico y se reescribe en cada transición.
+
+Las escrituras son atómicas (archivo temporal + fsync + os.replace) y las
+hace un hilo aparte que se queda siempre con la última versión pedida, así
+el hilo de la GUI nunca espera al disco.
+"""
+import json, os, threading
+from pathlib import Path
+
+def atomic_write_text(path, text):
+    """Escribe `text` en `path` sin dejar nunca un archivo a medias."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class BackgroundWriter:
+    """Hilo escritor: por cada ruta guarda solo el último contenido pendiente."""
+    def __init__(self):
+        self._pending = {}
+        self._busy = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, path, text):
+        with self._cond:
+            self._pending[str(path)] = text
+            self._cond.notify()
+
+    def remove(self, path):
+        with self._cond:
+            self._pending[str(path)] = None
+            self._cond.notify()
+
+    def flush(self):
+        """Espera a que no quede nada pendiente (al cerrar la app)."""
+        with self._cond:
+            while self._pending or self._busy:
+                self._cond.wait(0.05)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                path, text = next(iter(self._pending.items()))
+                del self._pending[path]
+                self._busy = True
+            try:
+                if text is None:
+                    if os.path.exists(path):
+                        os.remove(path)
+                else:
+                    atomic_write_text(path, text)
+            except Exception as e:
+                print("Error writing snapshot:", e)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+class RoundSnapshot:
+    def __init__(self, round_file="round.json", state_file="round_state.json", writer=None):
+        self.round_file = Path(round_file)
+        self.state_file = Path(state_file)
+        self.writer = writer or BackgroundWriter()
+        self.token = None
+
+    def save_round(self, token, data):
+        """Parte fija de la ronda; `token` identifica la ronda en el estado."""
+        self.token = token
+        self.writer.submit(self.round_file, json.dumps(dict(data, token=token), ensure_ascii=False))
+
+    def save_state(self, data):
+        if self.token is None:
+            return
+        self.writer.submit(self.state_file, json.dumps(dict(data, token=self.token), ensure_ascii=False))
+
+    def clear(self):
+        self.token = None
+        self.writer.remove(self.state_file)
+        self.writer.remove(self.round_file)
+
+    def load(self):
+        """(ronda, estado) si hay una ronda sin terminar y ambos archivos coinciden; si no, None."""
+        try:
+            if not (self.round_file.exists() and self.state_file.exists()):
+                return None
+            rnd = json.loads(self.round_file.read_text(encoding="utf-8"))
+            st = json.loads(self.state_file.read_text(encoding="utf-8"))
+        except Exception as e:
+            print("Error reading round snapshot:", e)
+            return None
+        if rnd.get("token") != st.get("token") or not rnd.get("questions"):
+            return None
+        self.token = rnd["token"]
+        return rnd, st
@@ -0,0 +1,180 @@
+# coding: utf-8
+"""
+Muestreo de rondas ponderado y estratificado con tablas alias.
+
+- Cuotas por sección proporcionales a lo que queda de cada una (resto mayor),
+  con al menos una pregunta por sección seleccionada cuando alcanza.
+- Dentro de cada sección, las cuotas se reparten entre bandas de dificultad
+  (fácil / media / difícil) para que la ronda quede balanceada.
+- En cada estrato se sortea por peso (cuánto hace que no se muestra la
+  pregunta) con una tabla alias (Vose): O(1) por sorteo.
+- Las preguntas sorteadas se marcan como borradas sin reconstruir la tabla; si
+  se sortea una borrada se vuelve a sortear, y la tabla se reconstruye solo
+  cuando lo borrado supera la mitad del peso. Una ronda cuesta O(per_round).
+"""
+import random, time
+
+BANDS = ("FACIL", "MEDIA", "DIFICIL")
+DAY = 86400.0
+MAX_AGE_DAYS = 180.0
+
+def difficulty_band(q):
+    d = q.get("difficulty")
+    if d is None:
+        return "MEDIA"
+    if d < 0.35:
+        return "FACIL"
+    if d > 0.65:
+        return "DIFICIL"
+    return "MEDIA"
+
+def freshness_weight(q, shown, now):
+    """Más peso cuanto más tiempo hace que no sale (nunca mostrada = máximo)."""
+    last = shown.get(q["id"])
+    age = MAX_AGE_DAYS if last is None else min(MAX_AGE_DAYS, max(0.0, (now - last) / DAY))
+    return 1.0 + age / 30.0
+
+def section_key(q):
+    return (q.get("section") or "").strip().upper()
+
+class AliasTable:
+    """Tabla alias de Vose sobre (items, pesos)."""
+    def __init__(self, items, weights):
+        n = len(items)
+        self.items = items
+        self.prob = [0.0] * n
+        self.alias = [0] * n
+        total = float(sum(weights))
+        if not n or total <= 0:
+            return
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self, rng):
+        i = int(rng.random() * len(self.items))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+class Stratum:
+    """Preguntas de un estrato con borrado perezoso sobre la tabla alias."""
+    def __init__(self, questions, weights):
+        self._build(list(questions), list(weights))
+
+    def _build(self, questions, weights):
+        self.questions = questions
+        self.weights = weights
+        self.alive = {q["id"]: i for i, q in enumerate(questions)}
+        self.total = float(sum(weights))
+        self.removed = 0.0
+        self.table = AliasTable(questions, weights)
+
+    def __len__(self):
+        return len(self.alive)
+
+    def remove(self, qid):
+        i = self.alive.pop(qid, None)
+        if i is None:
+            return
+        self.removed += self.weights[i]
+        if self.removed * 2 > self.total:
+            keep = sorted(self.alive.values())
+            self._build([self.questions[j] for j in keep], [self.weights[j] for j in keep])
+
+    def draw(self, rng):
+        while True:
+            q = self.questions[self.table.draw(rng)]
+            if q["id"] in self.alive:
+                return q
+
+def section_quotas(sizes, n):
+    """Reparte n entre secciones según su tamaño (resto mayor), sin pasarse de lo disponible."""
+    quotas = {s: 0 for s in sizes}
+    avail = {s: c for s, c in sizes.items() if c > 0}
+    if sum(avail.values()) < n:
+        raise ValueError("preguntas insuficientes")
+    # mínimo una por sección si alcanza para todas
+    if n >= len(avail):
+        for s in avail:
+            quotas[s] = 1
+    left = n - sum(quotas.values())
+    while left > 0:
+        room = {s: avail[s] - quotas[s] for s in avail if avail[s] > quotas[s]}
+        total = float(sum(room.values()))
+        shares = {s: left * r / total for s, r in room.items()}
+        given = {s: min(room[s], int(shares[s])) for s in room}
+        rest = left - sum(given.values())
+        for s in sorted(room, key=lambda s: shares[s] - int(shares[s]), reverse=True):
+            if rest <= 0:
+                break
+            if given[s] < room[s]:
+                given[s] += 1
+                rest -= 1
+        for s, g in given.items():
+            quotas[s] += g
+        left = n - sum(quotas.values())
+    return quotas
+
+class RoundSampler:
+    def __init__(self, questions, shown=None, now=None, rng=None):
+        """`questions`: preguntas disponibles; `shown`: id -> timestamp de la última vez mostrada."""
+        self.rng = rng or random.Random()
+        now = time.time() if now is None else now
+        shown = shown or {}
+        groups = {}
+        for q in questions:
+            groups.setdefault((section_key(q), difficulty_band(q)), []).append(q)
+        self.strata = {k: Stratum(qs, [freshness_weight(q, shown, now) for q in qs]) for k, qs in groups.items()}
+        self.where = {q["id"]: (section_key(q), difficulty_band(q)) for q in questions}
+
+    def available(self, sections=None):
+        """Preguntas disponibles por sección (todas si `sections` es None)."""
+        out = {}
+        for (sec, _), st in self.strata.items():
+            if sections is None or sec in sections:
+                out[sec] = out.get(sec, 0) + len(st)
+        return out
+
+    def mark_used(self, ids):
+        for qid in ids:
+            key = self.where.pop(qid, None)
+            if key:
+                self.strata[key].remove(qid)
+
+    def draw_round(self, n, sections=None):
+        """Sortea n preguntas y las retira del pool. ValueError si no alcanzan."""
+        sizes = self.available(sections)
+        quotas = section_quotas(sizes, n)
+        picked = []
+        for sec, quota in quotas.items():
+            if quota:
+                picked.extend(self._sample_section(sec, quota))
+        self.rng.shuffle(picked)
+        return picked
+
+    def _sample_section(self, sec, quota):
+        bands = {b: self.strata.get((sec, b)) for b in BANDS}
+        sizes = {b: len(st) for b, st in bands.items() if st}
+        # reparto parejo entre bandas; lo que falte en una lo cubren las demás
+        per_band = {b: 0 for b in sizes}
+        left = quota
+        while left:
+            room = [b for b in sizes if sizes[b] > per_band[b]]
+            self.rng.shuffle(room)
+            for b in room[:left]:
+                per_band[b] += 1
+            left = quota - sum(per_band.values())
+        out = []
+        for b, k in per_band.items():
+            for _ in range(k):
+                q = bands[b].draw(self.rng)
+                self.mark_used([q["id"]])
+                out.append(q)
+        return out
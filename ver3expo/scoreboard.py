@@ -0,0 +1,351 @@
+# coding: utf-8
+"""
+Servidor local de marcador para espectadores (HTTP + WebSocket, asyncio).
+
+- Corre en su propio hilo con su propio event loop, junto a QuizWindow.
+- QuizWindow lo registra como oyente de estado; cada evento (pregunta,
+  buzzer, marca, tick...) se convierte en un diff compacto de las claves
+  que cambiaron, se codifica una sola vez y se reparte a todos los clientes.
+- Cada cliente tiene una cola acotada; si un cliente lento la llena, se
+  vacía y se le encola un snapshot completo, así nunca frena al quiz ni
+  a los demás clientes.
+
+  GET /        página de marcador autocontenida
+  GET /state   snapshot JSON actual
+  GET /ws      WebSocket con {"ev", "seq", "ts", "d"} o {"ev": "full", "s"}
+
+Prueba de carga en localhost:
+  python scoreboard.py --bench --clients 500 --events 2000
+"""
+import asyncio, base64, hashlib, json, logging, struct, threading, time
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_MAX_FRAME = 4096 # los clientes solo mandan ping/close: más que esto no se lee
+WS_MAX_CONTROL = 125 # límite de RFC 6455 para ping/pong/close
+WS_TOO_BIG = 1009 # código de cierre "mensaje demasiado grande"
+
+class FrameTooBig(Exception):
+    pass
+
+def ws_frame(payload, opcode=0x1):
+    """Frame WebSocket del servidor (sin máscara)."""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 65536:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+async def ws_read_frame(reader, max_size=WS_MAX_FRAME):
+    """Lee un frame (enmascarado o no). Devuelve (opcode, payload).
+    FrameTooBig si el largo declarado pasa el tope, antes de leer el contenido."""
+    b1, b2 = await reader.readexactly(2)
+    n = b2 & 0x7f
+    if n == 126:
+        n = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if n > (WS_MAX_CONTROL if b1 & 0x08 else max_size):
+        raise FrameTooBig(n)
+    mask = await reader.readexactly(4) if b2 & 0x80 else None
+    data = await reader.readexactly(n)
+    if mask:
+        data = bytes(c ^ mask[i % 4] for i, c in enumerate(data))
+    return b1 & 0x0f, data
+
+def state_diff(old, new):
+    """Claves de primer nivel que cambiaron entre dos snapshots."""
+    if not old:
+        return dict(new)
+    return {k: v for k, v in new.items() if old.get(k) != v}
+
+class _Client:
+    __slots__ = ("writer", "queue", "resyncs")
+
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.resyncs = 0
+
+class ScoreboardServer:
+    def __init__(self, host="0.0.0.0", port=8765, queue_size=64):
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.clients = set()
+        self.state = {}
+        self.seq = 0
+        self.sent = 0
+        self.resyncs = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    # ---------- ciclo de vida ----------
+    def start(self):
+        """Arranca el servidor; devuelve self, o None si no pudo abrir el puerto."""
+        self._thread = threading.Thread(target=self._run, name="scoreboard", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        if self._server is None:
+            self.stop()
+            return None
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=1024))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            print("No se pudo iniciar el marcador:", e)
+            self._loop.close()
+            self._ready.set()
+            return
+        self._ready.set()
+        self._loop.run_forever()
+        self._server.close()
+        self._loop.run_until_complete(self._server.wait_closed())
+        self._loop.close()
+
+    def stop(self):
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    # ---------- publicación (llamado desde el hilo de Qt) ----------
+    def __call__(self, event, state):
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._broadcast, event, state)
+
+    def _full_frame(self):
+        msg = {"ev": "full", "seq": self.seq, "ts": time.time(), "s": self.state}
+        return ws_frame(json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    def _broadcast(self, event, state):
+        diff = state_diff(self.state, state)
+        self.state = state
+        if not diff:
+            return
+        self.seq += 1
+        msg = {"ev": event, "seq": self.seq, "ts": time.time(), "d": diff}
+        frame = ws_frame(json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        full = None
+        for c in self.clients:
+            try:
+                c.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # cliente lento: descartar diffs pendientes y mandar el estado completo
+                while not c.queue.empty():
+                    c.queue.get_nowait()
+                if full is None:
+                    full = self._full_frame()
+                c.queue.put_nowait(full)
+                c.resyncs += 1
+                self.resyncs += 1
+
+    # ---------- HTTP / WebSocket ----------
+    async def _handle(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        lines = request.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ")
+        path = parts[1] if len(parts) > 1 else "/"
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+
+        if headers.get("upgrade", "").lower() == "websocket":
+            await self._serve_ws(reader, writer, headers)
+            return
+        status, ctype, body = self._route(path)
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+                     f"Cache-Control: no-store\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    def _route(self, path):
+        """(status, content-type, cuerpo) de una ruta HTTP."""
+        if path == "/state":
+            return "200 OK", "application/json; charset=utf-8", json.dumps(self.state, ensure_ascii=False).encode("utf-8")
+        if path in ("/", "/index.html"):
+            return "200 OK", "text/html; charset=utf-8", PAGE.encode("utf-8")
+        return "404 Not Found", "text/plain", b"not found"
+
+    async def _serve_ws(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("latin-1"))
+        client = _Client(writer, self.queue_size)
+        client.queue.put_nowait(self._full_frame())
+        self.clients.add(client)
+        sender = asyncio.ensure_future(self._sender(client))
+        try:
+            while True:
+                opcode, data = await ws_read_frame(reader)
+                if opcode == 0x8: # close
+                    break
+                if opcode == 0x9: # ping -> pong
+                    writer.write(ws_frame(data, 0xA))
+        except FrameTooBig:
+            writer.write(ws_frame(struct.pack("!H", WS_TOO_BIG) + b"frame too big", 0x8))
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    async def _sender(self, client):
+        try:
+            while True:
+                frame = await client.queue.get()
+                client.writer.write(frame)
+                await client.writer.drain() # solo espera a este cliente
+                self.sent += 1
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+# ---------- página de marcador ----------
+PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
+<title>Quiz Tournament - Marcador</title>
+<style>
+body{margin:0;background:#0b0b0b;color:#f3f3f3;font-family:Helvetica,Arial,sans-serif}
+#bar{height:14px;background:#2B2B2B;border-radius:8px;margin:16px;overflow:hidden}
+#fill{height:100%;background:linear-gradient(90deg,#ff8a65,#ff3b30);width:100%}
+#num{text-align:right;margin:0 16px;font-weight:bold;font-size:22px}
+#q{background:rgba(255,255,255,.92);color:#202020;margin:12px 16px;padding:16px;border-radius:10px;font-weight:bold;font-size:26px;text-align:center}
+#opts{display:grid;grid-template-columns:1fr 1fr;gap:10px;margin:0 16px}
+.o{background:#2B2B2B;color:#cfcfcf;border-radius:8px;padding:12px;font-weight:bold;text-align:center}
+.ok{background:#1FB954;color:#fff}
+#teams{display:grid;grid-template-columns:1fr 1fr;gap:10px;margin:16px}
+.t{background:#d33a2a;border-radius:8px;padding:12px;text-align:center}
+.act{background:#ff8a65}
+.t b{display:block;font-size:20px}
+</style></head><body>
+<div id="num"></div><div id="bar"><div id="fill"></div></div>
+<div id="q">Conectando...</div><div id="opts"></div><div id="teams"></div>
+<script>
+let s={};
+function frac(){let t=Math.max(1,s.seconds_per_question||1),r=s.remaining||0;
+ if(s.timer_running){let e=Date.now()/1000-(s.tick_at||0);r=Math.max(r-e,r-1,0)}return Math.min(1,r/t)}
+function render(){
+ document.getElementById('q').textContent=s.text||'';
+ document.getElementById('num').textContent=s.remaining??'';
+ let o='';(s.options||[]).forEach((x,i)=>{if(x)o+='<div class="o'+(s.revealed&&s.correct_index===i?' ok':'')+'">'+String.fromCharCode(65+i)+') '+esc(x)+'</div>'});
+ document.getElementById('opts').innerHTML=o;
+ let t='';['A','B'].forEach(k=>{let x=(s.teams||{})[k]||{};t+='<div class="t'+(s.active_team===k?' act':'')+'"><b>'+esc(x.name||k)+'</b>Correctas: '+(x.correct||0)+' Erradas: '+(x.wrong||0)+'</div>'});
+ document.getElementById('teams').innerHTML=t}
+function esc(x){return String(x).replace(/[&<>]/g,c=>({'&':'&amp;','<':'&lt;','>':'&gt;'}[c]))}
+function frame(){document.getElementById('fill').style.width=(frac()*100)+'%';requestAnimationFrame(frame)}
+function connect(){let ws=new WebSocket('ws://'+location.host+'/ws');
+ ws.onmessage=e=>{let m=JSON.parse(e.data);if(m.ev==='full')s=m.s;else Object.assign(s,m.d);render()};
+ ws.onclose=()=>setTimeout(connect,1000)}
+connect();requestAnimationFrame(frame);
+</script></body></html>
+"""
+
+# ---------- prueba de carga ----------
+async def _bench_client(port, latencies, counts, idx, expected):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(idx.to_bytes(16, "big")).decode()
+    writer.write((f"GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+    await reader.readuntil(b"\r\n\r\n")
+    try:
+        while True:
+            _, data = await ws_read_frame(reader)
+            now = time.time()
+            msg = json.loads(data)
+            latencies.append(now - msg["ts"])
+            counts[idx] += 1
+            if msg["seq"] >= expected:
+                break
+    finally:
+        writer.close()
+
+def bench(clients=200, events=1000, rate=500.0, queue_size=64, connect_timeout=30.0):
+    # sin descriptores libres asyncio registra cada accept() fallido; acá solo interesa cuántos conectaron
+    logging.getLogger("asyncio").setLevel(logging.CRITICAL)
+    server = ScoreboardServer(host="127.0.0.1", port=0, queue_size=queue_size).start()
+    if server is None:
+        return
+    latencies, counts = [], [0] * clients
+
+    async def run_clients():
+        tasks = [asyncio.ensure_future(_bench_client(server.port, latencies, counts, i, events)) for i in range(clients)]
+        await asyncio.wait(tasks, timeout=120)
+
+    # los clientes corren en un loop aparte para no compartir loop con el servidor
+    done = threading.Event()
+    t = threading.Thread(target=lambda: (asyncio.run(run_clients()), done.set()), daemon=True)
+    t.start()
+    # esperar a los clientes, con plazo: algunos pueden no conectar (p. ej. límite de descriptores)
+    deadline = time.time() + connect_timeout
+    while len(server.clients) < clients and time.time() < deadline and not done.is_set():
+        time.sleep(0.01)
+    connected = len(server.clients)
+    if connected < clients:
+        print(f"conectaron {connected} de {clients} clientes")
+    if not connected:
+        server.stop()
+        return
+
+    start = time.perf_counter()
+    for i in range(events):
+        server("tick", {"remaining": i, "tick_at": time.time(), "text": "bench", "index": i})
+        if rate:
+            time.sleep(1.0 / rate)
+    publish_s = time.perf_counter() - start
+    done.wait(120)
+    elapsed = time.perf_counter() - start
+    server.stop()
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+    print(f"clientes={connected} eventos={events} publicados en {publish_s:.2f}s")
+    print(f"mensajes entregados={sum(counts)} ({sum(counts) / elapsed:.0f} msg/s), resyncs={server.resyncs}")
+    print(f"latencia fan-out: p50={pct(0.5):.1f} ms p99={pct(0.99):.1f} ms max={pct(1.0):.1f} ms")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Marcador para espectadores / prueba de carga")
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=500.0, help="eventos por segundo (0 = sin pausa)")
+    parser.add_argument("--queue", type=int, default=64, help="tamaño de la cola por cliente")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    if args.bench:
+        bench(args.clients, args.events, args.rate, args.queue)
+    else:
+        srv = ScoreboardServer(port=args.port).start()
+        if srv is None:
+            raise SystemExit(1)
+        print(f"Marcador en http://localhost:{srv.port}/ (Ctrl+C para salir)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            srv.stop()
@@ -0,0 +1,212 @@
+# coding: utf-8
+"""
+Simulador Monte Carlo de torneos: ¿alcanza el banco para lo planeado?
+
+Parte del banco y del historial de usadas (state.json) y juega el calendario
+de categorías muchas veces, ronda por ronda, con el mismo reparto por sección
+que usa el sorteo real (sampler.section_quotas). Como las cuotas dependen solo
+de lo que queda por sección, lo incierto es qué categorías se eligen en vivo:
+en el calendario, `?N` es "N categorías al azar entre las que tienen preguntas".
+
+Calendario: archivo (una ronda por línea) o texto con rondas separadas por ';'.
+Cada ronda es TODAS, categorías separadas por '|' o ?N. '#' comenta la línea.
+
+  TODAS
+  Inyección Electrónica | Chasis, Suspensión y Frenos
+  ?2
+
+Después del calendario se sigue repitiéndolo hasta que una ronda no alcance,
+para estimar cuántas rondas más aguanta el banco.
+
+  python simulator.py --bank questions.csv --schedule calendario.txt
+  python simulator.py --bank preguntas --schedule "TODAS;?2;?2" --sims 20000
+"""
+import os, random, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from sampler import section_quotas
+
+# ---------- calendario ----------
+def parse_schedule(text):
+    """Lista de rondas: "TODAS", ("pick", N) o un frozenset de secciones (en mayúsculas)."""
+    lines = text.splitlines() if "\n" in text else text.split(";")
+    rounds = []
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line.upper() == "TODAS":
+            rounds.append("TODAS")
+        elif line.startswith("?"):
+            rounds.append(("pick", int(line[1:] or 1)))
+        else:
+            rounds.append(frozenset(s.strip().upper() for s in line.split("|") if s.strip()))
+    return rounds
+
+def load_schedule(arg):
+    p = Path(arg)
+    return parse_schedule(p.read_text(encoding="utf-8") if p.exists() else arg)
+
+# ---------- simulación ----------
+def _round_sections(entry, order, left, rng):
+    if entry == "TODAS":
+        return order
+    if isinstance(entry, tuple):
+        alive = [s for s in order if left[s] > 0]
+        return rng.sample(alive, min(entry[1], len(alive)))
+    return [s for s in order if s in entry]
+
+def simulate_chunk(sizes, schedule, per_round, sims, seed, max_rounds):
+    """Corre `sims` torneos y devuelve los acumulados (para sumar entre procesos)."""
+    rng = random.Random(seed)
+    planned = len(schedule)
+    order = sorted(sizes)
+    # las cuotas dependen solo de lo que queda en las secciones elegidas: muchas
+    # simulaciones pasan por los mismos estados, así que se memorizan
+    memo = {}
+    acc = {
+        "sims": sims,
+        "fail_at": [0] * (planned + 1), # ronda del calendario que falló (planned = ninguna)
+        "exhausted": {s: 0 for s in sizes}, # sección en 0 al terminar el calendario
+        "left": {s: 0 for s in sizes}, # suma de lo que queda al terminar el calendario
+        "dist": [{s: 0 for s in sizes} for _ in range(planned)], # preguntas por sección y ronda
+        "played": [0] * planned, # veces que se jugó cada ronda del calendario
+        "total_rounds": [], # rondas que aguanta el banco (siguiendo el calendario en ciclo)
+    }
+    for _ in range(sims):
+        left = dict(sizes)
+        failed = None
+        k = 0
+        while k < max_rounds:
+            i = k % planned
+            secs = _round_sections(schedule[i], order, left, rng)
+            key = tuple(left[s] for s in secs) + tuple(secs)
+            quotas = memo.get(key)
+            if quotas is None:
+                try:
+                    quotas = section_quotas({s: left[s] for s in secs}, per_round)
+                except ValueError:
+                    quotas = False
+                if len(memo) > 500000:
+                    memo.clear()
+                memo[key] = quotas
+            if quotas is False:
+                if k < planned:
+                    failed = k
+                break
+            for s, q in quotas.items():
+                left[s] -= q
+            if k < planned:
+                acc["played"][k] += 1
+                for s, q in quotas.items():
+                    acc["dist"][k][s] += q
+            k += 1
+            if k == planned:
+                for s, c in left.items():
+                    acc["left"][s] += c
+                    acc["exhausted"][s] += c == 0
+        if failed is not None:
+            # el calendario no se completó: lo que queda es lo del momento del fallo
+            for s, c in left.items():
+                acc["left"][s] += c
+                acc["exhausted"][s] += c == 0
+        acc["fail_at"][planned if failed is None else failed] += 1
+        acc["total_rounds"].append(k)
+    return acc
+
+def _merge(parts):
+    out = parts[0]
+    for p in parts[1:]:
+        out["sims"] += p["sims"]
+        out["fail_at"] = [a + b for a, b in zip(out["fail_at"], p["fail_at"])]
+        for key in ("exhausted", "left"):
+            for s, v in p[key].items():
+                out[key][s] += v
+        for d, pd in zip(out["dist"], p["dist"]):
+            for s, v in pd.items():
+                d[s] += v
+        out["played"] = [a + b for a, b in zip(out["played"], p["played"])]
+        out["total_rounds"].extend(p["total_rounds"])
+    return out
+
+def run(sizes, schedule, per_round=60, sims=10000, workers=None, seed=None, max_rounds=1000):
+    """Reparte las simulaciones entre procesos y devuelve los acumulados."""
+    workers = max(1, min(workers or os.cpu_count() or 1, sims))
+    base = random.Random(seed).randrange(1 << 30)
+    chunks = [sims // workers + (1 if i < sims % workers else 0) for i in range(workers)]
+    args = [(sizes, schedule, per_round, n, base + i, max_rounds) for i, n in enumerate(chunks) if n]
+    if len(args) == 1:
+        return simulate_chunk(*args[0])
+    with ProcessPoolExecutor(max_workers=len(args)) as ex:
+        return _merge(list(ex.map(simulate_chunk, *zip(*args))))
+
+def _quantile(sorted_vals, q):
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+def print_report(acc, sizes, schedule, per_round, names=None):
+    names = names or {}
+    n = acc["sims"]
+    planned = len(schedule)
+    print(f"{n} torneos simulados, {planned} rondas planeadas de {per_round} preguntas, "
+          f"{sum(sizes.values())} preguntas disponibles")
+    ok = acc["fail_at"][planned]
+    print(f"\nCalendario completo: {100.0 * ok / n:.1f}%")
+    for k in range(planned):
+        if acc["fail_at"][k]:
+            print(f"  'Preguntas insuficientes' en la ronda {k + 1}: {100.0 * acc['fail_at'][k] / n:.1f}%")
+
+    total = sorted(acc["total_rounds"])
+    mean = sum(total) / len(total)
+    print(f"\nRondas que aguanta el banco (siguiendo el calendario): media {mean:.1f}, "
+          f"p5 {_quantile(total, 0.05)}, p50 {_quantile(total, 0.5)}, p95 {_quantile(total, 0.95)}")
+
+    print(f"\n{'sección':<40} {'disp.':>6} {'P(agotada)':>11} {'quedan (media)':>15}")
+    for s in sorted(sizes, key=lambda s: (-acc["exhausted"][s], names.get(s, s))):
+        print(f"{names.get(s, s)[:40]:<40} {sizes[s]:>6} {100.0 * acc['exhausted'][s] / n:>10.1f}% "
+              f"{acc['left'][s] / n:>15.1f}")
+
+    print("\nPreguntas por sección en cada ronda (media de las veces que se jugó):")
+    for k in range(planned):
+        played = acc["played"][k]
+        if not played:
+            print(f"  ronda {k + 1}: nunca se llegó a jugar")
+            continue
+        parts = [f"{names.get(s, s)} {v / played:.1f}" for s, v in
+                 sorted(acc["dist"][k].items(), key=lambda kv: -kv[1]) if v]
+        print(f"  ronda {k + 1}: " + ", ".join(parts))
+
+if __name__ == "__main__":
+    import argparse
+    from pool import QuestionPool
+    from sampler import section_key
+    parser = argparse.ArgumentParser(description="Simulador Monte Carlo de agotamiento del banco")
+    parser.add_argument("--bank", nargs="+", default=["questions.csv"], help="bancos: archivos CSV o carpetas")
+    parser.add_argument("--state", default="state.json", help="historial de usadas")
+    parser.add_argument("--schedule", default="TODAS", help="archivo de calendario o rondas separadas por ';'")
+    parser.add_argument("--per-round", type=int, default=60)
+    parser.add_argument("--sims", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=0, help="procesos (0 = todos los núcleos)")
+    parser.add_argument("--max-rounds", type=int, default=1000)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    try:
+        pool = QuestionPool(args.bank, state_file=args.state)
+    except ValueError as e:
+        parser.error(str(e))
+    sizes = {s: 0 for s in (sec.upper() for sec in pool.sections)}
+    sizes.update(pool.sampler.available())
+    names = {section_key(q): (q.get("section") or "").strip() for q in pool.questions}
+    schedule = load_schedule(args.schedule)
+    unknown = {s for e in schedule if isinstance(e, frozenset) for s in e} - set(sizes)
+    if unknown:
+        print("Categorías que no están en el banco:", ", ".join(sorted(unknown)))
+    if not schedule:
+        parser.error("calendario vacío")
+    if all(not isinstance(e, tuple) for e in schedule):
+        print("(calendario sin '?N': todas las simulaciones dan lo mismo)")
+
+    t0 = time.perf_counter()
+    acc = run(sizes, schedule, args.per_round, args.sims, args.workers or None, args.seed, args.max_rounds)
+    print_report(acc, sizes, schedule, args.per_round, names)
+    print(f"\n({time.perf_counter() - t0:.2f} s)")
@@ -0,0 +1,85 @@
+# coding: utf-8
+"""
+Watchdog de bloqueos del event loop de Qt.
+
+Un QTimer en el hilo de la GUI actualiza un "latido" cada `heartbeat_ms`.
+Un hilo aparte revisa ese latido; si el event loop no lo atiende durante
+más de `threshold_ms` (diálogo modal, escritura síncrona, escalado de
+imágenes...), captura el stack de Python del hilo principal y lo registra en
+ese momento (un congelamiento que nunca se recupera igual queda en el log);
+cuando el event loop vuelve, agrega la duración total del bloqueo.
+"""
+import sys, threading, time, traceback
+from datetime import datetime
+from PySide6.QtCore import QObject, QTimer
+
+
+class StallWatchdog(QObject):
+    def __init__(self, threshold_ms=250, heartbeat_ms=50, log_path="stalls.log", parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000.0
+        self.log_path = log_path
+        self.main_thread_id = threading.main_thread().ident
+        self.stall_count = 0
+
+        self._last_beat = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # el latido corre en el hilo que crea el watchdog (debe ser el de la GUI)
+        self._beat_timer = QTimer(self)
+        self._beat_timer.setInterval(heartbeat_ms)
+        self._beat_timer.timeout.connect(self._beat)
+
+    def start(self):
+        self._last_beat = time.monotonic()
+        self._beat_timer.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._beat_timer.stop()
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _beat(self):
+        self._last_beat = time.monotonic()
+
+    # ---------- hilo watchdog ----------
+    def _watch(self):
+        poll = min(self.threshold / 4.0, 0.05)
+        stall_started = None
+        while not self._stop.wait(poll):
+            lag = time.monotonic() - self._last_beat
+            if lag >= self.threshold:
+                if stall_started is None:
+                    # primer aviso de este bloqueo: registrar ya dónde está el hilo principal
+                    stall_started = self._last_beat
+                    self.stall_count += 1
+                    self._write(f"[{self._stamp()}] Bloqueo del event loop en curso "
+                                f"(>= {lag * 1000:.0f} ms)\n{self._main_stack()}")
+            elif stall_started is not None:
+                # el event loop volvió: solo falta la duración completa del bloqueo
+                self._write(f"[{self._stamp()}] Bloqueo terminado: "
+                            f"{(self._last_beat - stall_started) * 1000:.0f} ms\n\n")
+                stall_started = None
+
+    def _main_stack(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return "<stack no disponible>\n"
+        return "".join(traceback.format_stack(frame))
+
+    def _stamp(self):
+        return datetime.now().isoformat(timespec="milliseconds")
+
+    def _write(self, text):
+        print(text, file=sys.stderr, end="")
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(text)
+        except Exception as e:
+            print("Error writing stall log:", e)